@@ -0,0 +1,139 @@
+import codecs
+import json
+import os
+
+# Top-level arrays that are parsed element by element
+STREAMED_KEYS = ("images", "annotations")
+
+
+def file_signature(f):
+    """Identify the version of an open file by size and modification time"""
+    stat = os.fstat(f.fileno())
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _Scanner:
+    """Buffered reader that decodes one JSON value at a time from a file
+
+    Only a chunk or two of text is held in memory. Offsets are byte offsets
+    into the file as long as everything read so far was ASCII, which is
+    what json.dump writes by default.
+    """
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # File offset of buf[0]
+        self.eof = False
+        self.ascii = True
+        self.bytes_read = 0
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+            self.buf += self.text_decoder.decode(b"", final=True)
+            return
+        if self.ascii and not chunk.isascii():
+            self.ascii = False
+        # Drop consumed text so the buffer stays about one chunk long
+        if self.pos > self.chunk_size:
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += self.text_decoder.decode(chunk)
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.base + self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value and return it with its (start, end) offsets"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number running into the end of the buffer may be truncated
+            if end == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+            start = self.base + self.pos
+            self.pos = end
+            return obj, start, self.base + end
+
+
+def stream_load(path, progress=None, lazy_keypoints=True):
+    """Parse a COCO annotation file incrementally
+
+    Returns ``(data, spans, signature)``. With lazy_keypoints, annotations
+    are kept without their "keypoints" list and ``spans`` maps image_id to
+    the byte range of the full annotation record, to be read later with
+    load_annotation(). ``signature`` identifies the file version the spans
+    refer to. progress, if given, is called with the fraction of the file
+    read so far.
+    """
+    total = max(os.path.getsize(path), 1)
+    data = {}
+    spans = {}
+    with open(path, 'rb') as f:
+        signature = file_signature(f)
+        scanner = _Scanner(f)
+        scanner.expect('{')
+        while scanner.peek() != '}':
+            key, _, _ = scanner.value()
+            scanner.expect(':')
+            if key in STREAMED_KEYS and scanner.peek() == '[':
+                items = data[key] = []
+                scanner.expect('[')
+                while scanner.peek() != ']':
+                    item, start, end = scanner.value()
+                    # Only the first annotation of an image is looked up by
+                    # image_id, so only that one can be loaded lazily
+                    if (key == "annotations" and lazy_keypoints and scanner.ascii
+                        and "keypoints" in item and item["image_id"] not in spans):
+                        del item["keypoints"]
+                        spans[item["image_id"]] = (start, end)
+                    items.append(item)
+                    if scanner.peek() == ',':
+                        scanner.expect(',')
+                    if progress and len(items) % 1000 == 0:
+                        progress(scanner.bytes_read / total)
+                scanner.expect(']')
+            else:
+                data[key], _, _ = scanner.value()
+            if scanner.peek() == ',':
+                scanner.expect(',')
+        scanner.expect('}')
+    if progress:
+        progress(1.0)
+    return data, spans, signature
+
+
+def load_annotation(path, span, f=None):
+    """Read one annotation record from its byte range"""
+    start, end = span
+    if f is None:
+        with open(path, 'rb') as f:
+            return load_annotation(path, span, f)
+    f.seek(start)
+    return json.loads(f.read(end - start))
@@ -0,0 +1,402 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from annotation_loader import stream_load, load_annotation, file_signature
+from pose_sidecar import PoseSidecar, build_sidecar, write_sidecar
+from perf import timed
+
+
+def create_empty_annotations(pose_config):
+    """Return an empty COCO keypoint dataset for pose_config's skeleton"""
+    return {
+        "info": {
+            "description": "Pose Keypoint Dataset",
+            "url": "",
+            "version": "1.0",
+            "year": datetime.now().year,
+            "contributor": "",
+            "date_created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "licenses": [{"url": "", "id": 1, "name": ""}],
+        "images": [],
+        "annotations": [],
+        "categories": [pose_config.get_category_config()]
+    }
+
+
+class AnnotationStore:
+    """COCO annotation dict with hash indexes for the GUI's hot paths
+
+    ``data`` is the plain COCO structure that gets written to
+    annotations.json. Images and annotations must be added through the store
+    so that the lookups by image id, by (video_file, frame_number), by video
+    and by annotation image_id stay O(1).
+
+    A store loaded with lazy keypoints keeps annotations without their
+    "keypoints" list until get_annotation() or materialize() reads them from
+    ``source_path``; code that walks ``annotations`` directly must call
+    materialize() first. get_poses() serves such keypoints from the pose
+    sidecar instead, when one matching the loaded snapshot exists.
+    """
+
+    def __init__(self, data, source_path=None, lazy_spans=None, source_signature=None):
+        self.data = data
+        self.source_path = source_path
+        # image_id -> byte range of the annotation record in source_path
+        self.lazy_spans = lazy_spans or {}
+        self.source_signature = source_signature
+        # PoseSidecar of the snapshot lazy_spans point into, if any
+        self.sidecar = None
+        self.reindex()
+
+    @classmethod
+    def load(cls, path, progress=None, lazy_keypoints=True):
+        """Load a snapshot and replay any journaled saves made after it"""
+        data, spans, signature = stream_load(path, progress, lazy_keypoints)
+        store = cls(data, path, spans, signature)
+        if spans:
+            # Read into memory rather than mapped, so saves can replace the file
+            store.sidecar = PoseSidecar.open(path, in_memory=True)
+        AnnotationJournal(path).replay(store)
+        return store
+
+    def snapshot(self):
+        """Capture the current records for from_snapshot() on another thread
+
+        Only the record lists are copied, which is cheap enough for the GUI
+        thread. Keypoint lists are shared; saves replace them, never mutate.
+        """
+        return (dict(self.data, images=list(self.images), annotations=list(self.annotations)),
+                self.source_path, dict(self.lazy_spans), self.source_signature)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Independent store over a snapshot() result, e.g. to save it off the GUI thread"""
+        data, source_path, lazy_spans, signature = snapshot
+        # Copying a record is atomic, so edits made meanwhile on the GUI thread
+        # never change a record while it is being encoded, and reading lazy
+        # keypoints into the copies leaves the GUI's records alone
+        data = dict(data, images=[dict(image) for image in data["images"]],
+                    annotations=[dict(annotation) for annotation in data["annotations"]])
+        return cls(data, source_path, lazy_spans, signature)
+
+    def save(self, path, sidecar=False):
+        """Rewrite the whole snapshot atomically, optionally with its pose sidecar"""
+        text = self.encode()
+        write_snapshot(text, path, build_sidecar(self) if sidecar else None)
+
+    @timed()
+    def encode(self):
+        """Serialize the COCO dict the way annotations.json is written"""
+        self.materialize()
+        return json.dumps(self.data, indent=2)
+
+    def materialize(self):
+        """Read every keypoint list that is still only on disk"""
+        if self.lazy_spans:
+            self._load_keypoints(list(self.lazy_spans))
+
+    def _load_keypoints(self, image_ids):
+        with open(self.source_path, 'rb') as f:
+            if file_signature(f) != self.source_signature:
+                # annotations.json was rewritten (e.g. compacted) since it was
+                # loaded; the records are still there but at new offsets
+                _, spans, self.source_signature = stream_load(self.source_path)
+                self.lazy_spans = {image_id: spans[image_id]
+                                   for image_id in self.lazy_spans if image_id in spans}
+                return self._load_keypoints(
+                    [image_id for image_id in image_ids if image_id in self.lazy_spans])
+            for image_id in image_ids:
+                record = load_annotation(self.source_path, self.lazy_spans.pop(image_id), f)
+                self.annotations_by_image[image_id]["keypoints"] = record["keypoints"]
+
+    def adopt_spans(self, path, spans, signature):
+        """Point lazy keypoints at a rewritten snapshot of source_path
+
+        spans and signature are a read_spans() result for the new file, taken
+        off the GUI thread, so the next lazy read need not re-stream it.
+        """
+        if (not self.lazy_spans or self.source_path is None or
+            os.path.abspath(path) != os.path.abspath(self.source_path)):
+            return
+        self.lazy_spans = {image_id: spans[image_id]
+                           for image_id in self.lazy_spans if image_id in spans}
+        self.source_signature = signature
+
+    def reindex(self):
+        """Rebuild every index from ``data``"""
+        self.images_by_id = {}
+        self.images_by_frame = {}
+        self.images_by_video = {}  # video_file -> {image id: image}
+        self.annotations_by_image = {}
+        self.max_image_id = 0
+        self.max_annotation_id = 0
+        for image in self.data["images"]:
+            self._index_image(image)
+        for annotation in self.data["annotations"]:
+            self._index_annotation(annotation)
+
+    def _index_image(self, image):
+        self.images_by_id[image["id"]] = image
+        self.images_by_frame[(image.get("video_file"), image.get("frame_number"))] = image
+        self.images_by_video.setdefault(image.get("video_file"), {})[image["id"]] = image
+        self.max_image_id = max(self.max_image_id, image["id"])
+
+    def _index_annotation(self, annotation):
+        # Like the previous linear scans, the first annotation of an image wins
+        self.annotations_by_image.setdefault(annotation["image_id"], annotation)
+        self.max_annotation_id = max(self.max_annotation_id, annotation.get("id", 0))
+
+    @property
+    def images(self):
+        return self.data["images"]
+
+    @property
+    def annotations(self):
+        return self.data["annotations"]
+
+    def get_image(self, image_id):
+        return self.images_by_id.get(image_id)
+
+    def find_image(self, video_file, frame_number):
+        """Return the image saved from frame_number of video_file, if any"""
+        return self.images_by_frame.get((video_file, frame_number))
+
+    def video_images(self, video_file):
+        """The images saved from video_file, in the order they were added"""
+        return list(self.images_by_video.get(video_file, {}).values())
+
+    def get_annotation(self, image_id):
+        if image_id in self.lazy_spans:
+            self._load_keypoints([image_id])
+        return self.annotations_by_image.get(image_id)
+
+    def get_annotations(self, image_ids):
+        """Like get_annotation for many images, reading lazy keypoints in one pass"""
+        lazy = [image_id for image_id in image_ids if image_id in self.lazy_spans]
+        if lazy:
+            self._load_keypoints(lazy)
+        return [self.annotations_by_image.get(image_id) for image_id in image_ids]
+
+    def get_poses(self, image_ids, keypoint_count):
+        """(K, 3) float32 keypoints of many images, None where there are none
+
+        Lazy keypoints are taken from the pose sidecar when possible, which
+        skips seeking to and parsing their JSON records. Only images whose
+        keypoints are still lazy are read from it: those have not changed
+        since the snapshot the sidecar mirrors.
+        """
+        sidecar = self.sidecar
+        if sidecar is not None and len(sidecar.keypoint_names) != keypoint_count:
+            sidecar = None
+        poses = [None] * len(image_ids)
+        pending = []
+        for i, image_id in enumerate(image_ids):
+            row = None
+            if sidecar is not None and image_id in self.lazy_spans:
+                row = sidecar.row_of(image_id)
+            if row is None:
+                pending.append(i)
+            elif sidecar.lengths[row] == keypoint_count * 3:
+                poses[i] = sidecar.keypoints[row]
+        for i, annotation in zip(pending, self.get_annotations([image_ids[i] for i in pending])):
+            keypoints = annotation.get("keypoints") if annotation else None
+            if keypoints and len(keypoints) == keypoint_count * 3:
+                poses[i] = np.asarray(keypoints, dtype=np.float32).reshape(keypoint_count, 3)
+        return poses
+
+    def next_image_id(self):
+        return self.max_image_id + 1
+
+    def next_annotation_id(self):
+        return self.max_annotation_id + 1
+
+    def add(self, image, annotation):
+        """Append a new image together with its annotation"""
+        self.data["images"].append(image)
+        self.data["annotations"].append(annotation)
+        self._index_image(image)
+        self._index_annotation(annotation)
+
+    def remove(self, image_id):
+        """Take back an image and its annotation, e.g. after saving them failed
+
+        Ids are not handed out again. Recently added records are found fast.
+        """
+        image = self.images_by_id.pop(image_id, None)
+        if image is None:
+            return
+        _remove_record(self.data["images"], image)
+        key = (image.get("video_file"), image.get("frame_number"))
+        if self.images_by_frame.get(key) is image:
+            del self.images_by_frame[key]
+        self.images_by_video.get(image.get("video_file"), {}).pop(image_id, None)
+        annotation = self.annotations_by_image.pop(image_id, None)
+        if annotation is not None:
+            _remove_record(self.data["annotations"], annotation)
+        self.lazy_spans.pop(image_id, None)
+
+    def upsert(self, image, annotation):
+        """Add an image and annotation, or update them in place if the id exists"""
+        existing_image = self.images_by_id.get(image["id"])
+        if existing_image is None:
+            self.add(image, annotation)
+            return
+        existing_image.update(image)
+        self._index_image(existing_image)
+
+        existing_annotation = self.annotations_by_image.get(image["id"])
+        if existing_annotation is None:
+            self.data["annotations"].append(annotation)
+            self._index_annotation(annotation)
+        else:
+            existing_annotation.update(annotation)
+            self._index_annotation(existing_annotation)
+            if "keypoints" in annotation:
+                self.lazy_spans.pop(image["id"], None)
+
+
+def _remove_record(records, record):
+    # Search from the end, where the records added last are
+    for i in range(len(records) - 1, -1, -1):
+        if records[i] is record:
+            del records[i]
+            return
+
+
+def read_spans(path):
+    """(spans, signature) of the lazy keypoints of a snapshot, for adopt_spans()"""
+    _, spans, signature = stream_load(path)
+    return spans, signature
+
+
+def write_snapshot(text, path, sidecar=None):
+    """Atomically replace annotations.json with already encoded text
+
+    sidecar, a build_sidecar() result taken together with the text, is
+    written as the binary pose file mirroring the new snapshot.
+    """
+    _replace_file(text, path)
+    if sidecar is not None:
+        write_sidecar(path, sidecar)
+    # Everything journaled so far is now part of the snapshot
+    AnnotationJournal(path).discard()
+
+
+def _replace_file(text, path):
+    # Write to a temporary file first so a crash never leaves a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AnnotationJournal:
+    """Write-ahead log of saved frames next to annotations.json
+
+    Each save appends one JSON line holding the image and annotation records
+    and costs the same regardless of dataset size. Compaction folds the log
+    into the snapshot on a background thread. The snapshot is rebuilt from
+    the files on disk, so it never races with edits made in the GUI. With
+    sidecar set, compaction also rewrites the binary pose file.
+    on_compacted, if given, is called on the compaction thread with the
+    file and its read_spans() result once the snapshot has been rewritten.
+    """
+
+    def __init__(self, annotation_file, compact_every=200, sidecar=False,
+                 on_compacted=None):
+        self.annotation_file = annotation_file
+        self.journal_path = annotation_file + ".journal"
+        # The journal is renamed to this while it is being compacted
+        self.compacting_path = annotation_file + ".journal.compacting"
+        self.compact_every = compact_every
+        self.sidecar = sidecar
+        self.on_compacted = on_compacted
+        self.pending_records = 0
+        self._thread = None
+
+    @timed()
+    def append(self, image, annotation):
+        """Durably record one saved frame"""
+        record = json.dumps({"image": image, "annotation": annotation})
+        with open(self.journal_path, 'a') as f:
+            f.write(record + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending_records += 1
+        if self.pending_records >= self.compact_every:
+            self.compact()
+
+    def records(self):
+        """Yield (image, annotation) for every save not yet in the snapshot"""
+        for path in (self.compacting_path, self.journal_path):
+            yield from _read_records(path)
+
+    def replay(self, store):
+        """Apply journaled records that are not yet in the snapshot"""
+        for image, annotation in self.records():
+            store.upsert(image, annotation)
+
+    def compact(self, wait=False):
+        """Fold the journal into the snapshot on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            if wait:
+                self._thread.join()
+            else:
+                return
+        # A compaction interrupted by a crash is finished first
+        if not os.path.exists(self.compacting_path):
+            if not os.path.exists(self.journal_path):
+                return
+            os.replace(self.journal_path, self.compacting_path)
+        self.pending_records = 0
+
+        self._thread = threading.Thread(target=self._compact, daemon=False)
+        self._thread.start()
+        if wait:
+            self._thread.join()
+
+    def _compact(self):
+        with open(self.annotation_file, 'r') as f:
+            store = AnnotationStore(json.load(f))
+        for image, annotation in _read_records(self.compacting_path):
+            store.upsert(image, annotation)
+        # Records appended since the journal was rotated must survive
+        _replace_file(store.encode(), self.annotation_file)
+        if self.sidecar:
+            write_sidecar(self.annotation_file, build_sidecar(store))
+        os.remove(self.compacting_path)
+        if self.on_compacted is not None:
+            self.on_compacted(self.annotation_file, *read_spans(self.annotation_file))
+
+    def close(self):
+        """Compact everything that is still journaled and wait for it"""
+        self.compact(wait=True)
+
+    def discard(self):
+        """Forget the journal after the full snapshot has been rewritten"""
+        if self._thread is not None:
+            self._thread.join()
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.pending_records = 0
+
+
+def _read_records(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash during append can leave a truncated last line
+                continue
+            yield record["image"], record["annotation"]
@@ -1,60 +1,34 @@
 import sys
-import json
 import os
 import cv2
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QLabel, QPushButton, QFileDialog, 
                            QListWidget, QGraphicsView, QGraphicsScene, QSlider,
-                           QSpinBox, QMessageBox, QComboBox, QTextEdit)
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor, QTextCursor
-from PyQt5.QtCore import Qt, QPointF, QRectF
+                           QSpinBox, QMessageBox, QTextEdit,
+                           QProgressDialog, QShortcut)
+from PyQt5.QtGui import (QPixmap, QPainter, QPen, QBrush, QColor, QTextCursor,
+                         QKeySequence)
+from PyQt5.QtCore import Qt, QPointF, QRectF, QTimer, pyqtSignal
 
 from pose_config import*
+from frame_cache import FrameCache
+from video_processor import VideoProcessor, write_frame
+from frame_prefetcher import FramePrefetcher
+from annotation_store import (AnnotationStore, AnnotationJournal, create_empty_annotations,
+                              read_spans)
+from save_worker import SaveWorker
+from frame_browser import FrameBrowser
+from tiled_image import TiledImageItem, frame_to_qimage
+from interpolation import KeyframeInterpolator
+from keypoint_tracker import KeypointTracker
+from pose import Pose, PoseLayout
+from perf import profiler, timed
+from workspace import DecoderPool, VideoWorkspace
+from thumbnails import ThumbnailAtlas, ThumbnailBuilder, atlas_path
+from filmstrip import Filmstrip
 
 
-class VideoProcessor:
-    def __init__(self):
-        self.video_path = None
-        self.cap = None
-        self.total_frames = 0
-        self.fps = 0
-        self.frame_width = 0
-        self.frame_height = 0
-        
-    def load_video(self, video_path):
-        self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-        self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-    def get_frame(self, frame_number):
-        if self.cap is None:
-            return None
-        
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = self.cap.read()
-        if ret:
-            # return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            return frame
-        return None
-    
-    def save_frame(self, frame_number, output_dir, image_id):
-        frame = self.get_frame(frame_number)
-        if frame is not None:
-            # Format filename with 12 digits using image_id (COCO format)
-            filename = f"{image_id:012d}.jpg"
-            output_path = os.path.join(output_dir, filename)
-            cv2.imwrite(output_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-            return filename
-        return None
-    
-    def close(self):
-        if self.cap is not None:
-            self.cap.release()
-
 class ImageViewer(QGraphicsView):
     def __init__(self, pose_config, parent=None):
         super().__init__(parent)
@@ -74,21 +48,90 @@ class ImageViewer(QGraphicsView):
         self.scale(zoom_factor, zoom_factor)
             
 class KeypointScene(QGraphicsScene):
+    """Long-lived scene holding the frame and a fixed pool of overlay items
+
+    One ellipse and label per keypoint, one line per skeleton connection and
+    one bbox rect are created up front. Edits and frame changes only move,
+    restyle, show or hide these items, and set_frame swaps the pixmap.
+    
+    Single-keypoint edits go through set_keypoint/remove_keypoint, which mark
+    the keypoint dirty; refresh_dirty then redraws only its marker, the bones
+    touching it and the bbox, whose min/max is maintained incrementally.
+    
+    Keypoints loaded as provisional (interpolated estimates) are drawn as
+    hollow markers until the user places them.
+    """
     def __init__(self, pose_config, parent=None):
         super().__init__(parent)
         self.pose_config = pose_config
-        self.keypoints = {}
+        # Name -> row map and skeleton index arrays, shared by every Pose
+        self.layout = PoseLayout.from_config(pose_config)
+        self.keypoints = Pose(self.layout)
+        self.provisional_keypoints = set()
         self.current_keypoint = None
         self.keypoint_items = {}
         self.keypoint_updated = None
-        self.bbox_item = None
-        self.skeleton_lines = []  # Add this line to track skeleton lines
         self.editing_enabled = True
         
         # Colors for different states
         self.highlighted_color = QColor(255, 255, 0)  # Yellow for highlighted
         self.visible_color = QColor(0, 255, 0)       # Green for visible
         self.invisible_color = QColor(255, 165, 0)    # Orange for invisible but labeled
+        
+        self.dirty_keypoints = set()
+        # Unpadded [x_min, y_min, x_max, y_max] of all keypoints, or None
+        self.bounds = None
+        self.bounds_stale = False
+        
+        # Frame image, always below the overlay
+        self.pixmap_item = self.addPixmap(QPixmap())
+        self.pixmap_item.setZValue(-1)
+        # Very large frames are drawn tile by tile from a pyramid instead
+        self.tiled_item = TiledImageItem(self.pose_config.render_tile_size)
+        self.tiled_item.setZValue(-1)
+        self.tiled_item.hide()
+        self.addItem(self.tiled_item)
+        
+        # Skeleton lines, one per connection
+        pen = QPen(self.pose_config.skeleton_color)
+        pen.setWidth(2)
+        self.skeleton_lines = []
+        for _ in self.pose_config.skeleton:
+            line = self.addLine(0, 0, 0, 0, pen)
+            line.hide()
+            self.skeleton_lines.append(line)
+        
+        # Bounding box
+        pen = QPen(QColor(255, 165, 0))  # Orange color
+        pen.setStyle(Qt.DashLine)
+        pen.setWidth(2)
+        self.bbox_item = self.addRect(0, 0, 0, 0, pen)
+        self.bbox_item.hide()
+        
+        # Keypoint markers and labels, positioned with setPos
+        for kp_name in self.layout.names:
+            ellipse = self.addEllipse(-3, -3, 6, 6)
+            text = self.addText(kp_name)
+            for item in (ellipse, text):
+                item.setZValue(1)
+                item.hide()
+            self.keypoint_items[kp_name] = (ellipse, text)
+    
+    def set_frame(self, pixmap, scale=1.0):
+        """Swap in a new frame image; scale maps it to scene coordinates"""
+        if self.tiled_item.isVisible():
+            self.tiled_item.hide()
+            self.tiled_item.clear()
+        self.pixmap_item.setPixmap(pixmap)
+        self.pixmap_item.setScale(scale)
+        self.pixmap_item.show()
+
+    def set_tiled_frame(self, frame):
+        """Swap in a very large BGR frame, drawn only where it is visible"""
+        self.pixmap_item.hide()
+        self.pixmap_item.setPixmap(QPixmap())
+        self.tiled_item.set_image(frame)
+        self.tiled_item.show()
 
     def mousePressEvent(self, event):
         if not self.editing_enabled:
@@ -98,160 +141,277 @@ class KeypointScene(QGraphicsScene):
             pos = event.scenePos()
             # Right click for visibility=1 (labeled but not visible)
             if event.button() == Qt.RightButton:
-                self.keypoints[self.current_keypoint] = (pos.x(), pos.y(), 1)
+                self.set_keypoint(self.current_keypoint, pos.x(), pos.y(), 1)
             # Left click for visibility=2 (visible)
             elif event.button() == Qt.LeftButton:
-                self.keypoints[self.current_keypoint] = (pos.x(), pos.y(), 2)
+                self.set_keypoint(self.current_keypoint, pos.x(), pos.y(), 2)
                 
-            self.update_keypoint_visuals()
+            self.refresh_dirty()
             
             if self.keypoint_updated:
                 self.keypoint_updated(self.current_keypoint, True)
-            
-            self.update_bounding_box()
+    
+    def set_keypoint(self, kp_name, x, y, v, provisional=False):
+        """Place one keypoint; call refresh_dirty() to redraw"""
+        old = self.keypoints.get(kp_name)
+        self.keypoints[kp_name] = (x, y, v)
+        # Bounds are tracked on the stored float32 values
+        x, y, _ = self.keypoints[kp_name]
+        if provisional:
+            self.provisional_keypoints.add(kp_name)
+        else:
+            self.provisional_keypoints.discard(kp_name)
+        self.dirty_keypoints.add(kp_name)
+        self._update_bounds(old, (x, y))
+    
+    def remove_keypoint(self, kp_name):
+        """Remove one keypoint; call refresh_dirty() to redraw"""
+        old = self.keypoints.pop(kp_name, None)
+        self.provisional_keypoints.discard(kp_name)
+        if old is not None:
+            self.dirty_keypoints.add(kp_name)
+            self._update_bounds(old, None)
+    
+    def set_keypoints(self, keypoints, provisional=False):
+        """Replace all keypoints at once, e.g. when a frame is loaded
 
+        A Pose is taken over as is; a name -> (x, y, v) mapping is copied.
+        """
+        if not isinstance(keypoints, Pose):
+            keypoints = Pose.from_mapping(self.layout, keypoints)
+        self.keypoints = keypoints
+        self.provisional_keypoints = set(keypoints) if provisional else set()
+        self.bounds_stale = True
+        self.update_keypoint_visuals()
+    
+    def clear_keypoints(self):
+        self.set_keypoints({})
+    
+    @timed()
+    def refresh_dirty(self):
+        """Redraw dirty keypoints, their incident bones and the bbox"""
+        bones = set()
+        for kp_name in self.dirty_keypoints:
+            self._update_marker(kp_name)
+            bones.update(self.layout.bones_at[self.layout.index[kp_name]])
+        for bone in bones:
+            self._update_bone(bone)
+        self.dirty_keypoints.clear()
+        self.update_bounding_box()
+
+    @timed()
     def update_keypoint_visuals(self):
-        # Clear existing visualizations
-        for items in self.keypoint_items.values():
-            for item in items:
-                self.removeItem(item)
-        self.keypoint_items.clear()
+        """Redraw everything; use after changing self.keypoints directly"""
+        self.bounds_stale = True
+        self.dirty_keypoints.clear()
         
         # Draw skeleton first
         self.draw_skeleton()
         
-        # Draw keypoints
-        for kp_name, (x, y, v) in self.keypoints.items():
-            items = []
-            
-            # Use colors from pose_config instead of self.keypoint_colors
-            base_color = self.pose_config.keypoint_colors.get(kp_name, QColor(0, 255, 0))
-            if kp_name == self.current_keypoint:
-                color = QColor(255, 255, 0)  # Highlight in yellow
-            else:
-                color = base_color
-            
-            # Adjust opacity based on visibility
-            if v == 1:  # Labeled but not visible
-                color.setAlpha(128)
-            
-            # Draw point
-            ellipse = self.addEllipse(x-3, y-3, 6, 6, QPen(color), color)
-            text = self.addText(kp_name)
-            text.setDefaultTextColor(color)
-            text.setPos(x+5, y+5)
-            
-            items.extend([ellipse, text])
-            self.keypoint_items[kp_name] = items
+        for kp_name in self.keypoint_items:
+            self._update_marker(kp_name)
         
         self.update_bounding_box()
     
+    def _update_marker(self, kp_name):
+        """Move and restyle the pooled items of one keypoint"""
+        if kp_name not in self.keypoint_items:
+            return
+        ellipse, text = self.keypoint_items[kp_name]
+        if kp_name not in self.keypoints:
+            ellipse.hide()
+            text.hide()
+            return
+        x, y, v = self.keypoints[kp_name]
+        
+        # Use colors from pose_config instead of self.keypoint_colors
+        base_color = self.pose_config.keypoint_colors.get(kp_name, QColor(0, 255, 0))
+        if kp_name == self.current_keypoint:
+            color = QColor(255, 255, 0)  # Highlight in yellow
+        else:
+            color = QColor(base_color)
+        
+        # Adjust opacity based on visibility
+        if v == 1:  # Labeled but not visible
+            color.setAlpha(128)
+        
+        # Draw point; estimates are hollow until confirmed
+        if kp_name in self.provisional_keypoints:
+            pen = QPen(color)
+            pen.setStyle(Qt.DotLine)
+            ellipse.setPen(pen)
+            ellipse.setBrush(QBrush(Qt.NoBrush))
+        else:
+            ellipse.setPen(QPen(color))
+            ellipse.setBrush(color)
+        ellipse.setPos(x, y)
+        text.setDefaultTextColor(color)
+        text.setPos(x+5, y+5)
+        ellipse.show()
+        text.show()
+    
+    def _update_bounds(self, old, new):
+        """Keep the keypoint min/max current after one point moved"""
+        if self.bounds_stale:
+            return
+        if old is not None and self.bounds is not None:
+            x_min, y_min, x_max, y_max = self.bounds
+            # Moving or removing an extreme point may shrink the box, which
+            # needs a rescan; that is deferred until the box is next used
+            if old[0] in (x_min, x_max) or old[1] in (y_min, y_max):
+                self.bounds_stale = True
+                return
+        if new is not None:
+            x, y = new
+            if self.bounds is None:
+                self.bounds = [x, y, x, y]
+            else:
+                self.bounds = [min(self.bounds[0], x), min(self.bounds[1], y),
+                               max(self.bounds[2], x), max(self.bounds[3], y)]
+    
     def calculate_bbox(self):
         """Calculate bounding box from keypoints"""
-        if not self.keypoints:
+        if self.bounds_stale:
+            self.bounds = self.keypoints.bounds()
+            self.bounds_stale = False
+        
+        if not self.keypoints or self.bounds is None:
             return None
-            
-        valid_x = [x for x, y, v in self.keypoints.values()]
-        valid_y = [y for x, y, v in self.keypoints.values()]
+        x_min, y_min, x_max, y_max = self.bounds
         
-        if valid_x and valid_y:
-            x_min, x_max = min(valid_x), max(valid_x)
-            y_min, y_max = min(valid_y), max(valid_y)
-            
-            # Add padding to make box slightly larger than the keypoints
-            padding = 30
-            x_min -= padding
-            y_min -= padding
-            x_max += padding
-            y_max += padding
-            
-            return [x_min, y_min, x_max - x_min, y_max - y_min]
-        return None
+        # Add padding to make box slightly larger than the keypoints
+        padding = 30
+        x_min -= padding
+        y_min -= padding
+        x_max += padding
+        y_max += padding
+        
+        return [x_min, y_min, x_max - x_min, y_max - y_min]
 
     def set_current_keypoint(self, keypoint_name):
         """Set the currently selected keypoint and update visuals"""
+        previous = self.current_keypoint
         self.current_keypoint = keypoint_name
-        # Highlight the currently selected keypoint
-        self.update_keypoint_visuals()
+        # Only the old and new selection change their highlight
+        for kp_name in {previous, keypoint_name}:
+            if kp_name:
+                self._update_marker(kp_name)
 
     def reset_keypoint(self, keypoint_name):
         """Reset (remove) a specific keypoint"""
         if keypoint_name in self.keypoints:
-            del self.keypoints[keypoint_name]
-            self.update_keypoint_visuals()
-            if hasattr(self, 'keypoint_updated'):
+            self.remove_keypoint(keypoint_name)
+            self.refresh_dirty()
+            if self.keypoint_updated:
                 self.keypoint_updated(keypoint_name, False)    
     
     
     # Add skeleton drawing functionality
     def draw_skeleton(self):
-        # Clear existing skeleton lines
-        for line in self.skeleton_lines:
-            self.removeItem(line)
-        self.skeleton_lines.clear()
-        
-        keypoints_list = []
-        for kp_name in self.pose_config.keypoint_names:
-            if kp_name in self.keypoints:
-                x, y, v = self.keypoints[kp_name]
-                keypoints_list.append((x, y, v))
+        visible = self.keypoints.bone_mask()
+        # (B, 4) start/end coordinates of every bone in one gather
+        segments = self.keypoints.data[self.layout.bones, :2].reshape(-1, 4).tolist()
+        for line, shown, segment in zip(self.skeleton_lines, visible, segments):
+            if shown:
+                line.setLine(*segment)
+                line.show()
             else:
-                keypoints_list.append((0, 0, 0))
-        
-        for connection in self.pose_config.skeleton:
-            start_idx = connection[0] - 1
-            end_idx = connection[1] - 1
-            
-            if (start_idx < len(keypoints_list) and end_idx < len(keypoints_list)):
-                start_x, start_y, start_v = keypoints_list[start_idx]
-                end_x, end_y, end_v = keypoints_list[end_idx]
-                
-                if start_v > 0 and end_v > 0:
-                    pen = QPen(self.pose_config.skeleton_color)
-                    pen.setWidth(2)
-                    line = self.addLine(start_x, start_y, end_x, end_y, pen)
-                    self.skeleton_lines.append(line)  # Store the line
+                line.hide()
+    
+    def _update_bone(self, bone):
+        line = self.skeleton_lines[bone]
+        start, end = self.keypoints.data[self.layout.bones[bone]].tolist()
+        if start[2] > 0 and end[2] > 0:
+            line.setLine(start[0], start[1], end[0], end[1])
+            line.show()
+        else:
+            line.hide()
 
     
     def update_bounding_box(self):
-        if self.bbox_item:
-            self.removeItem(self.bbox_item)
-            self.bbox_item = None
-        
         bbox = self.calculate_bbox()
         if bbox:
-            pen = QPen(QColor(255, 165, 0))  # Orange color
-            pen.setStyle(Qt.DashLine)
-            pen.setWidth(2)
-            self.bbox_item = self.addRect(bbox[0], bbox[1], bbox[2], bbox[3], pen)
+            self.bbox_item.setRect(bbox[0], bbox[1], bbox[2], bbox[3])
+            self.bbox_item.show()
+        else:
+            self.bbox_item.hide()
 
 
 class IntegratedPoseTool(QMainWindow):
+    # annotations.json was rewritten off the GUI thread: path, spans, signature
+    snapshotRewritten = pyqtSignal(str, object, object)
+
     def __init__(self, pose_config):
         super().__init__()
         self.pose_config = pose_config  # Store the pose config
-        self.video_processor = VideoProcessor()
+        self.video_processor = VideoProcessor(
+            FrameCache(pose_config.frame_cache_mb * 1024 * 1024),
+            seek_threshold=pose_config.seek_threshold_frames)
+        # Decodes on a worker thread so scrubbing never blocks the event loop
+        self.frame_prefetcher = FramePrefetcher(
+            self.video_processor.frame_cache,
+            seek_threshold=pose_config.seek_threshold_frames,
+            window=pose_config.prefetch_window,
+            use_index=pose_config.use_keyframe_index,
+            max_open=pose_config.max_open_videos,
+            preview_max_size=pose_config.preview_max_size)
+        self.frame_prefetcher.frameReady.connect(self.onFrameReady)
+        self.frame_prefetcher.previewReady.connect(self.onPreviewReady)
+        self.frame_prefetcher.start()
+        # Source videos of the project; self.video_processor is the decoder of
+        # the current one, taken from a pool of recently used open decoders
+        self.workspace = VideoWorkspace(DecoderPool(
+            self.video_processor.frame_cache, pose_config.max_open_videos,
+            pose_config.seek_threshold_frames, pose_config.use_keyframe_index))
+        # Builds the filmstrip's thumbnail atlas in one pass over each video
+        self.thumbnail_builder = ThumbnailBuilder(pose_config.thumbnail_width,
+                                                  pose_config.thumbnail_max_count)
+        self.thumbnail_builder.atlasReady.connect(self.onAtlasReady)
+        self.thumbnail_builder.progress.connect(lambda *_: self.filmstrip.update())
+        self.thumbnail_builder.start()
+        # Tracks keypoints into the next frame without blocking the GUI
+        self.keypoint_tracker = KeypointTracker(pose_config.tracking_window,
+                                                pose_config.tracking_levels)
+        self.keypoint_tracker.poseTracked.connect(self.onPoseTracked)
+        self.keypoint_tracker.start()
+        self.displayed_frame = None  # (video_path, frame_number) currently on screen
+        self.current_frame_bgr = None  # Decoded buffer of displayed_frame, reused on save
+        # (displayed_frame, keypoints, provisional names) from before previewing started
+        self.preview_stash = None
+        # JPEG encoding and annotation writes happen off the GUI thread
+        self.save_worker = SaveWorker(self)
+        self.save_worker.writeFinished.connect(
+            lambda description: self.addStatusMessage(f"Written to disk: {description}", "green"))
+        self.save_worker.writeFailed.connect(
+            lambda description: self.addStatusMessage(f"Write failed: {description}", "red"))
         self.current_frame_number = 0
         self.output_dir = None
         self.current_working_image = None  # To track if we are working on video or annotation
-        self.annotations = self.create_empty_annotations()
+        self.store = AnnotationStore(self.create_empty_annotations())
+        self.journal = None  # Write-ahead log for the current annotations.json
+        # Image records of new frames whose JPEG could not be written, by id()
+        # so a reloaded project reusing an image id is unaffected. Only save
+        # jobs use it: jobs queued before the undo ran must leave them out.
+        self.failed_frames = {}
+        # Lazy keypoints follow the rewritten file instead of re-streaming it
+        self.snapshotRewritten.connect(
+            lambda path, spans, signature: self.store.adopt_spans(path, spans, signature))
+        # Estimates keypoints of unlabelled frames from the labelled ones
+        self.interpolator = KeyframeInterpolator(
+            self.store, len(pose_config.keypoint_names),
+            pose_config.interpolation_method, pose_config.interpolation_max_gap)
         self.initUI()
+        
+        # Hot-path timings, reported every perf_report_interval_ms while enabled
+        profiler.window = pose_config.perf_window
+        self.perf_reported_samples = 0
+        self.perf_timer = QTimer(self)
+        self.perf_timer.setInterval(pose_config.perf_report_interval_ms)
+        self.perf_timer.timeout.connect(self.updatePerformanceDisplay)
+        self.setPerformanceTiming(pose_config.perf_enabled)
 
     def create_empty_annotations(self):
-        return {
-            "info": {
-                "description": "Pose Keypoint Dataset",
-                "url": "",
-                "version": "1.0",
-                "year": datetime.now().year,
-                "contributor": "",
-                "date_created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            },
-            "licenses": [{"url": "", "id": 1, "name": ""}],
-            "images": [],
-            "annotations": [],
-            "categories": [self.pose_config.get_category_config()]
-        }
+        return create_empty_annotations(self.pose_config)
         
     def setOutputDirectory(self):
         self.output_dir = QFileDialog.getExistingDirectory(
@@ -259,19 +419,21 @@ class IntegratedPoseTool(QMainWindow):
         if self.output_dir:
             # Create necessary subdirectories
             os.makedirs(os.path.join(self.output_dir, "frames"), exist_ok=True)
+            self.loadWorkspace()
+            self.requestThumbnails()
             
             # Check for existing annotations
             annotation_file = os.path.join(self.output_dir, 'annotations.json')
             if os.path.exists(annotation_file):
                 try:
-                    with open(annotation_file, 'r') as f:
-                        self.annotations = json.load(f)
+                    self.store = self.loadStore(annotation_file)
+                    self.interpolator.set_store(self.store)
                     # Update frame dropdown with existing annotations
                     self.updateFrameDropdown()
                     QMessageBox.information(self, "Loaded Annotations", 
                                         f"Loaded existing annotations from:\n{annotation_file}\n"
-                                        f"Contains {len(self.annotations['images'])} images and "
-                                        f"{len(self.annotations['annotations'])} annotations.")
+                                        f"Contains {len(self.store.images)} images and "
+                                        f"{len(self.store.annotations)} annotations.")
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Failed to load existing annotations: {str(e)}")
             else:
@@ -279,6 +441,41 @@ class IntegratedPoseTool(QMainWindow):
                                     f"Will create new annotations file at:\n{annotation_file}")
     
         
+    def workspaceFile(self):
+        return os.path.join(self.output_dir, "workspace.json") if self.output_dir else None
+    
+    def loadWorkspace(self):
+        """Merge the project's registered videos and save the combined list"""
+        try:
+            self.workspace.load(self.workspaceFile())
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Failed to load workspace.json: {str(e)}")
+        self.saveWorkspace()
+    
+    def saveWorkspace(self):
+        if not self.workspaceFile():
+            return
+        try:
+            self.workspace.save(self.workspaceFile())
+        except OSError as e:
+            self.addStatusMessage(f"Could not save workspace.json: {e}", "red")
+        
+    def loadStore(self, annotation_file):
+        """Stream an annotations file in, showing progress for large files"""
+        self.closeJournal()
+        progress_dialog = QProgressDialog("Loading annotations...", None, 0, 100, self)
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        
+        def report(fraction):
+            progress_dialog.setValue(int(fraction * 100))
+            QApplication.processEvents()
+        
+        try:
+            return AnnotationStore.load(annotation_file, report)
+        finally:
+            progress_dialog.close()
+        
     def exitProgram(self):
         reply = QMessageBox.question(self, 'Exit Program',
                                    'Are you sure you want to exit?',
@@ -297,7 +494,16 @@ class IntegratedPoseTool(QMainWindow):
         
         # Create image viewer with pose config
         self.viewer = ImageViewer(self.pose_config)
-        layout.addWidget(self.viewer, stretch=2)
+        # Filmstrip of thumbnails under the frame
+        viewer_layout = QVBoxLayout()
+        viewer_layout.addWidget(self.viewer, stretch=1)
+        self.filmstrip = Filmstrip(
+            ThumbnailAtlas.layout(1, (16, 9), self.pose_config.thumbnail_width)[3])
+        self.filmstrip.framePreviewed.connect(self.previewThumbnail)
+        self.filmstrip.frameSelected.connect(self.updateFrame)
+        self.filmstrip.setVisible(self.pose_config.thumbnails)
+        viewer_layout.addWidget(self.filmstrip)
+        layout.addLayout(viewer_layout, stretch=2)
         
         # Create right panel
         right_panel = QWidget()
@@ -310,6 +516,10 @@ class IntegratedPoseTool(QMainWindow):
         load_video_btn.clicked.connect(self.loadVideo)
         file_group.addWidget(load_video_btn)
         
+        add_videos_btn = QPushButton('Add Video Folder')
+        add_videos_btn.clicked.connect(self.addVideoFolder)
+        file_group.addWidget(add_videos_btn)
+        
         load_annotations_btn = QPushButton('Load Annotations')
         load_annotations_btn.clicked.connect(self.loadAnnotations)
         file_group.addWidget(load_annotations_btn)
@@ -323,20 +533,30 @@ class IntegratedPoseTool(QMainWindow):
         frame_group = QVBoxLayout()
         right_layout.addWidget(QLabel('Frame Selection:'))
         
-        # Dropdown for labeled frames
-        self.frame_dropdown = QComboBox()
-        self.frame_dropdown.currentIndexChanged.connect(self.loadSelectedFrame)
-        frame_group.addWidget(self.frame_dropdown)
+        # Browser for labeled frames
+        self.frame_browser = FrameBrowser(len(self.pose_config.keypoint_names))
+        self.frame_browser.imageSelected.connect(self.loadSelectedFrame)
+        self.frame_browser.set_store(self.store)
+        frame_group.addWidget(self.frame_browser)
         
         # Frame slider for video navigation
         frame_control = QHBoxLayout()
         self.frame_slider = QSlider(Qt.Horizontal)
-        self.frame_slider.valueChanged.connect(self.updateFrame)
+        self.frame_slider.valueChanged.connect(self.scheduleFrame)
+        self.frame_slider.sliderReleased.connect(
+            lambda: self.scheduleFrame(self.frame_slider.value()))
         frame_control.addWidget(self.frame_slider)
         
         self.frame_spinbox = QSpinBox()
-        self.frame_spinbox.valueChanged.connect(self.updateFrame)
+        self.frame_spinbox.valueChanged.connect(self.scheduleFrame)
         frame_control.addWidget(self.frame_spinbox)
+        
+        # Bursts of slider/spinbox changes collapse into one update per tick
+        self.requested_frame = None
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(self.pose_config.frame_update_interval_ms)
+        self.frame_timer.timeout.connect(self.flushFrameRequest)
         frame_group.addLayout(frame_control)
         right_layout.addLayout(frame_group)
         
@@ -385,6 +605,24 @@ class IntegratedPoseTool(QMainWindow):
         self.message_prompt.setReadOnly(True)  # Make it read-only
         self.message_prompt.setMaximumHeight(100)  # Limit height
         right_layout.addWidget(self.message_prompt)
+        
+        # Performance overlay in the top-left corner of the frame view
+        self.perf_overlay = QLabel(self.viewer)
+        self.perf_overlay.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: rgb(160, 255, 160); "
+            "font-family: monospace; padding: 4px;")
+        self.perf_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.perf_overlay.move(8, 8)
+        self.perf_overlay.hide()
+        # Which frame a slider or filmstrip preview actually shows
+        self.preview_label = QLabel(self.viewer)
+        self.preview_label.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: white; padding: 4px;")
+        self.preview_label.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.preview_label.hide()
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self,
+                  activated=lambda: self.setPerformanceTiming(not profiler.enabled))
+        QShortcut(QKeySequence("Ctrl+Shift+E"), self, activated=self.exportPerformanceTrace)
     
     def saveBtnClicked(self):
         # First, get the current frame info from the metadata display
@@ -425,6 +663,40 @@ class IntegratedPoseTool(QMainWindow):
         self.message_prompt.insertHtml(html)
         self.message_prompt.ensureCursorVisible()       
         
+    def setPerformanceTiming(self, enabled):
+        profiler.enabled = enabled
+        if enabled:
+            self.perf_timer.start()
+        else:
+            self.perf_timer.stop()
+            self.perf_overlay.hide()
+        
+    def updatePerformanceDisplay(self):
+        # Report only when something was timed since the last report
+        samples = profiler.sample_count()
+        if samples == self.perf_reported_samples:
+            return
+        self.perf_reported_samples = samples
+        if self.pose_config.perf_display == "overlay":
+            self.perf_overlay.setText("p50 / p95 / p99\n" + profiler.format_summary())
+            self.perf_overlay.adjustSize()
+            self.perf_overlay.show()
+            self.perf_overlay.raise_()
+        elif self.pose_config.perf_display == "messages":
+            self.addStatusMessage("p50 / p95 / p99 - " + profiler.format_summary(" | "), "gray")
+        
+    def exportPerformanceTrace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Performance Trace", "trace.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            profiler.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Failed to export trace: {str(e)}")
+            return
+        self.addStatusMessage(f"Performance trace written to {path}")
+        
     def updateKeypointStatus(self, keypoint_name, is_labeled):
         items = self.keypoint_list.findItems(keypoint_name, Qt.MatchExactly)
         if items:
@@ -452,8 +724,8 @@ class IntegratedPoseTool(QMainWindow):
             return
             
         try:
-            with open(annotations_file, 'r') as f:
-                self.annotations = json.load(f)
+            self.store = self.loadStore(annotations_file)
+            self.interpolator.set_store(self.store)
             
             # Set output directory to annotations location
             self.output_dir = os.path.dirname(annotations_file)
@@ -462,58 +734,93 @@ class IntegratedPoseTool(QMainWindow):
             self.updateFrameDropdown()
             
             QMessageBox.information(self, "Loaded Annotations", 
-                                  f"Successfully loaded {len(self.annotations['images'])} "
-                                  f"images and {len(self.annotations['annotations'])} annotations.")
+                                  f"Successfully loaded {len(self.store.images)} "
+                                  f"images and {len(self.store.annotations)} annotations.")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load annotations: {str(e)}")
             
+    @timed()
     def updateFrameDropdown(self):
-        self.frame_dropdown.clear()
-        for image in self.annotations['images']:
-            self.frame_dropdown.addItem(
-                f"Frame {image['frame_number']} (ID: {image['id']})", 
-                userData=image['id'])
+        # Only needed when a whole project is loaded; saves insert single rows
+        self.frame_browser.set_store(self.store)
+        self.updateFilmstripMarks()
+    
+    def updateFilmstripMarks(self):
+        video_file = getattr(self.video_processor, 'video_file', None)
+        self.filmstrip.set_annotated_frames(
+            image["frame_number"] for image in self.store.video_images(video_file))
 
 
-    def displayFrame(self, frame, annotation_data=None):
-        height, width, channel = frame.shape
-        bytes_per_line = 3 * width
-        q_image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        
-        # Create new scene
-        new_scene = KeypointScene(self.pose_config)
-        self.viewer.setScene(new_scene)
-        
-        # Add image to scene
-        pixmap = QPixmap.fromImage(q_image)
-        new_scene.addPixmap(pixmap)
-        self.viewer.setSceneRect(QRectF(pixmap.rect()))
+    @timed()
+    def displayFrame(self, frame, annotation_data=None, provisional=False):
+        """Show a BGR frame as decoded by OpenCV and load its keypoints"""
+        # Swap the frame into the persistent scene; fromImage is the only copy
+        scene = self.viewer.scene()
+        height, width = frame.shape[:2]
+        if max(height, width) > self.pose_config.tiled_render_min_size:
+            # Uploading and rescaling the whole frame would stall every repaint
+            scene.set_tiled_frame(frame)
+        else:
+            with profiler.span("frame_upload"):
+                pixmap = QPixmap.fromImage(frame_to_qimage(frame))
+            scene.set_frame(pixmap)
+        scene.editing_enabled = True
+        self.preview_label.hide()
+        self.viewer.setSceneRect(QRectF(0, 0, width, height))
         self.viewer.fitInView(self.viewer.sceneRect(), Qt.KeepAspectRatio)
         
         # Reset keypoint highlights
         for i in range(self.keypoint_list.count()):
             self.keypoint_list.item(i).setBackground(QColor(255, 255, 255))
         
-        # Set up keypoint update callback
-        new_scene.keypoint_updated = self.updateKeypointStatus
-        
         # Load existing keypoints if provided
+        loaded_keypoints = Pose(scene.layout)
         if annotation_data:
-            keypoints = annotation_data['keypoints']
-            for i, kp_name in enumerate(self.pose_config.keypoint_names):
-                x = keypoints[i * 3]
-                y = keypoints[i * 3 + 1]
-                v = keypoints[i * 3 + 2]
-                if v > 0:  # If keypoint exists
-                    new_scene.keypoints[kp_name] = (x, y, v)
-                    self.updateKeypointStatus(kp_name, True)
-            
-            new_scene.update_keypoint_visuals()
+            loaded_keypoints = Pose.from_coco(scene.layout, annotation_data['keypoints'])
+        scene.set_keypoints(loaded_keypoints, provisional)
+        for kp_name in loaded_keypoints:
+            self.updateKeypointStatus(kp_name, True)
         
         # Preserve the selected keypoint
         current_keypoint = self.keypoint_list.currentItem().text()
-        new_scene.set_current_keypoint(current_keypoint)
+        scene.set_current_keypoint(current_keypoint)
 
+    def displayPreview(self, frame, shown_frame):
+        """Show an already downscaled, read-only frame while the slider is dragged
+
+        shown_frame is the frame the preview was taken from, which may be a
+        keyframe or thumbnail before the requested one.
+        """
+        width = self.video_processor.frame_width
+        height = self.video_processor.frame_height
+        small_width = frame.shape[1]
+        
+        requested = self.current_frame_number
+        text = f"Preview of frame {shown_frame}"
+        if shown_frame != requested:
+            text += f" (approximates {requested})"
+        self.preview_label.setText(text)
+        self.preview_label.adjustSize()
+        self.preview_label.move(8, self.viewer.height() - self.preview_label.height() - 8)
+        self.preview_label.show()
+        self.preview_label.raise_()
+        
+        scene = self.viewer.scene()
+        if self.displayed_frame is not None:
+            # Keep unsaved edits of the shown frame in case previewing ends on it
+            self.preview_stash = (self.displayed_frame, dict(scene.keypoints),
+                                  set(scene.provisional_keypoints))
+        scene.editing_enabled = False
+        # Stretch back to full-resolution scene coordinates
+        scene.set_frame(QPixmap.fromImage(frame_to_qimage(frame)), width / small_width)
+        # The previous frame's keypoints do not belong to the preview
+        if scene.keypoints:
+            scene.clear_keypoints()
+        self.viewer.setSceneRect(QRectF(0, 0, width, height))
+        self.viewer.fitInView(self.viewer.sceneRect(), Qt.KeepAspectRatio)
+        self.displayed_frame = None
+        self.current_frame_bgr = None
+    
     def updateMetadataDisplay(self, image_data, annotation_data):
         bbox = annotation_data.get('bbox', [0, 0, 0, 0])
         
@@ -527,8 +834,8 @@ class IntegratedPoseTool(QMainWindow):
                 source = "Annotation only"
         
         # Get visibility counts
-        visible_points = len([k for k in annotation_data['keypoints'][2::3] if k == 2])
-        estimated_points = len([k for k in annotation_data['keypoints'][2::3] if k == 1])
+        visible_points, estimated_points = Pose.from_coco(
+            self.viewer.scene().layout, annotation_data['keypoints']).visibility_counts()
         
         info_text = (
             f"Source: {source}\n"
@@ -547,34 +854,79 @@ class IntegratedPoseTool(QMainWindow):
         video_path, _ = QFileDialog.getOpenFileName(
             self, "Select Video File", "", "Video Files (*.mp4 *.avi *.mov)")
         if video_path:
-            self.video_processor.video_file = os.path.basename(video_path)
-            self.video_processor.load_video(video_path)
-            self.frame_slider.setMaximum(self.video_processor.total_frames - 1)
-            self.frame_spinbox.setMaximum(self.video_processor.total_frames - 1)
-            self.updateFrame(0)
-
-    def loadSelectedFrame(self, index):
-        if index < 0:
+            video_file = self.workspace.register(video_path)
+            self.saveWorkspace()
+            if self.switchVideo(video_file):
+                self.updateFrame(0)
+    
+    def addVideoFolder(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select Video Folder")
+        if directory:
+            try:
+                video_files = self.workspace.register_directory(directory)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Failed to read folder: {str(e)}")
+                return
+            self.saveWorkspace()
+            self.addStatusMessage(f"Registered {len(video_files)} videos from {directory}")
+    
+    def switchVideo(self, video_file):
+        """Make a registered video current, reusing its decoder if it is still open"""
+        # The first open of a video may build its keyframe index
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.video_processor = self.workspace.processor(video_file)
+        except OSError as e:
+            self.addStatusMessage(str(e), "red")
+            return False
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.frame_slider.setMaximum(self.video_processor.total_frames - 1)
+        self.frame_spinbox.setMaximum(self.video_processor.total_frames - 1)
+        self.filmstrip.set_video(self.video_processor.total_frames)
+        self.updateFilmstripMarks()
+        self.requestThumbnails()
+        return True
+    
+    def requestThumbnails(self):
+        """Build (or resume) the current video's thumbnail atlas in the output directory"""
+        processor = self.video_processor
+        if (not self.pose_config.thumbnails or not self.output_dir or
+            processor.cap is None or processor.total_frames <= 0):
             return
-            
-        image_id = self.frame_dropdown.currentData()
-        image_data = next(img for img in self.annotations['images'] 
-                         if img['id'] == image_id)
+        self.thumbnail_builder.request(
+            processor.video_path, atlas_path(self.output_dir, processor.video_file),
+            processor.total_frames, (processor.frame_width, processor.frame_height))
+    
+    def onAtlasReady(self, video_path, path):
+        if video_path == self.video_processor.video_path:
+            self.filmstrip.set_atlas(ThumbnailAtlas.open(path))
+
+    def loadSelectedFrame(self, image_id):
+        image_data = self.store.get_image(image_id)
         
         # Load corresponding annotation
-        annotation_data = next(ann for ann in self.annotations['annotations'] 
-                             if ann['image_id'] == image_id)
+        annotation_data = self.store.get_annotation(image_id)
+        if image_data is None or annotation_data is None:
+            return
+        
+        # Frames of other registered videos are decoded from their source too
+        video_file = image_data.get('video_file')
+        if (getattr(self.video_processor, 'video_file', None) != video_file and
+            video_file in self.workspace):
+            self.switchVideo(video_file)
         
         # Sync video frame if the video matches
         if (hasattr(self.video_processor, 'video_file') and 
-            self.video_processor.video_file == image_data['video_file']):
+            self.video_processor.video_file == video_file):
             self.current_frame_number = image_data['frame_number']
-            self.frame_slider.setValue(self.current_frame_number)
-            self.frame_spinbox.setValue(self.current_frame_number)
+            self.syncFrameControls(self.current_frame_number)
             
             # Get frame from video
             frame = self.video_processor.get_frame(self.current_frame_number)
+            self.displayed_frame = (self.video_processor.video_path, self.current_frame_number)
         else:
+            self.displayed_frame = None
             # Load from saved frame
             image_path = os.path.join(self.output_dir, "frames", image_data['file_name'])
             if not os.path.exists(image_path):
@@ -583,50 +935,172 @@ class IntegratedPoseTool(QMainWindow):
             frame = cv2.imread(image_path)
         
         if frame is None:
+            self.displayed_frame = None
             return
             
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.current_frame_bgr = frame
         self.displayFrame(frame, annotation_data)
         self.updateMetadataDisplay(image_data, annotation_data)
     
+    def scheduleFrame(self, frame_number):
+        self.requested_frame = frame_number
+        if not self.frame_timer.isActive():
+            self.frame_timer.start()
+    
+    def flushFrameRequest(self):
+        frame_number = self.requested_frame
+        self.requested_frame = None
+        if frame_number is None:
+            return
+        
+        # Cheap downscaled preview while dragging, full decode on release
+        if self.frame_slider.isSliderDown():
+            self.previewFrame(frame_number)
+        elif (frame_number != self.current_frame_number or
+              self.displayed_frame != (self.video_processor.video_path, frame_number)):
+            self.updateFrame(frame_number)
+    
+    def syncFrameControls(self, frame_number):
+        # Block signals so that updating one control does not echo back
+        for control in (self.frame_slider, self.frame_spinbox):
+            control.blockSignals(True)
+            control.setValue(frame_number)
+            control.blockSignals(False)
+        self.filmstrip.set_current_frame(frame_number)
+    
+    def previewFrame(self, frame_number):
+        self.current_frame_number = frame_number
+        self.syncFrameControls(frame_number)
+        if self.video_processor.cap is None:
+            return
+        
+        # Cached frames are downscaled by the prefetcher as well, so the GUI
+        # thread never resizes a full-resolution frame
+        if not self.previewThumbnail(frame_number):
+            self.frame_prefetcher.request(self.video_processor.video_path, frame_number,
+                                          preview=True)
+    
+    def previewThumbnail(self, frame_number):
+        """Show the atlas thumbnail of frame_number without touching the decoder"""
+        self.current_frame_number = frame_number
+        self.syncFrameControls(frame_number)
+        thumbnail = self.filmstrip.thumbnail(frame_number)
+        if thumbnail is None:
+            return False
+        self.displayPreview(thumbnail, self.filmstrip.thumbnail_frame(frame_number))
+        return True
+    
+    def onPreviewReady(self, video_path, frame_number, shown_frame, frame):
+        if (video_path == self.video_processor.video_path and
+            frame_number == self.current_frame_number and
+            self.frame_slider.isSliderDown()):
+            self.displayPreview(frame, shown_frame)
+    
     def updateFrame(self, frame_number):
         self.current_frame_number = frame_number
-        self.frame_slider.setValue(frame_number)
-        self.frame_spinbox.setValue(frame_number)
+        self.syncFrameControls(frame_number)
         
-        frame = self.video_processor.get_frame(frame_number)
+        if self.video_processor.cap is None:
+            return
+        
+        # Show cached frames immediately; anything else is decoded by the
+        # prefetch thread and arrives through onFrameReady
+        video_path = self.video_processor.video_path
+        frame = self.video_processor.frame_cache.get(video_path, frame_number)
+        self.frame_prefetcher.request(video_path, frame_number)
         if frame is not None:
-            # Check if this frame is already annotated
-            existing_annotation = None
-            existing_image = None
-            if hasattr(self.video_processor, 'video_file'):
-                for img in self.annotations["images"]:
-                    if (img["video_file"] == self.video_processor.video_file and 
-                        img["frame_number"] == frame_number):
-                        existing_image = img
-                        existing_annotation = next(
-                            ann for ann in self.annotations["annotations"] 
-                            if ann["image_id"] == img["id"])
-                        break
-            
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            self.displayFrame(frame, existing_annotation)
-            
-            if existing_image and existing_annotation:
-                self.updateMetadataDisplay(existing_image, existing_annotation)
+            self.showVideoFrame(frame_number, frame)
+    
+    def onFrameReady(self, video_path, frame_number, frame):
+        # Drop frames for requests the slider has already moved past
+        if (video_path != self.video_processor.video_path or
+            frame_number != self.current_frame_number or
+            self.displayed_frame == (video_path, frame_number)):
+            return
+        self.showVideoFrame(frame_number, frame)
+    
+    def showVideoFrame(self, frame_number, frame):
+        # What was on screen before is the source for keypoint tracking; only
+        # labelled or user-placed points are tracked, never earlier estimates,
+        # so stepping through a gap does not chain tracks of tracks
+        previous = self.displayed_frame
+        previous_frame = self.current_frame_bgr
+        scene = self.viewer.scene()
+        previous_keypoints = {kp_name: kp for kp_name, kp in scene.keypoints.items()
+                              if kp_name not in scene.provisional_keypoints}
+        
+        video_path = self.video_processor.video_path
+        self.displayed_frame = (video_path, frame_number)
+        self.current_frame_bgr = frame
+        
+        # Check if this frame is already annotated
+        existing_annotation = None
+        existing_image = None
+        if hasattr(self.video_processor, 'video_file'):
+            existing_image = self.store.find_image(
+                self.video_processor.video_file, frame_number)
+            if existing_image:
+                existing_annotation = self.store.get_annotation(existing_image["id"])
+        
+        if existing_annotation is None and self.pose_config.interpolate_keypoints:
+            # Prefill from the surrounding labelled frames of this video
+            pose = self.interpolator.provisional_pose(
+                getattr(self.video_processor, 'video_file', None), frame_number)
+            if pose is not None:
+                self.displayFrame(frame, {"keypoints": pose}, provisional=True)
             else:
-                # Create temporary image data for video-only frame
-                temp_image_data = {
-                    "video_file": getattr(self.video_processor, 'video_file', 'N/A'),
-                    "frame_number": frame_number,
-                    "id": None
-                }
-                temp_annotation_data = {
-                    "bbox": [0, 0, 0, 0],
-                    "keypoints": [0] * (len(self.pose_config.keypoint_names) * 3)
-                }
-                self.updateMetadataDisplay(temp_image_data, temp_annotation_data)
+                self.displayFrame(frame)
+        else:
+            self.displayFrame(frame, existing_annotation)
+        
+        # Previewing that came back to the frame it started from keeps its edits
+        stash, self.preview_stash = self.preview_stash, None
+        restored = stash is not None and stash[0] == self.displayed_frame
+        if restored:
+            scene = self.viewer.scene()
+            scene.set_keypoints(stash[1])
+            scene.provisional_keypoints = stash[2] & set(scene.keypoints)
+            scene.update_keypoint_visuals()
+            for kp_name in scene.keypoints:
+                self.updateKeypointStatus(kp_name, True)
+        
+        if (not restored and existing_annotation is None and
+            self.pose_config.track_keypoints and previous_keypoints and
+            previous_frame is not None and previous is not None and previous[0] == video_path and
+            0 < frame_number - previous[1] <= self.pose_config.tracking_max_step):
+            self.keypoint_tracker.request(video_path, previous[1], previous_frame,
+                                          previous_keypoints, frame_number, frame)
+        
+        if existing_image and existing_annotation:
+            self.updateMetadataDisplay(existing_image, existing_annotation)
+        else:
+            # Create temporary image data for video-only frame
+            temp_image_data = {
+                "video_file": getattr(self.video_processor, 'video_file', 'N/A'),
+                "frame_number": frame_number,
+                "id": None
+            }
+            temp_annotation_data = {
+                "bbox": [0, 0, 0, 0],
+                "keypoints": [0] * (len(self.pose_config.keypoint_names) * 3)
+            }
+            self.updateMetadataDisplay(temp_image_data, temp_annotation_data)
+    
+    def onPoseTracked(self, video_path, frame_number, keypoints):
+        if self.displayed_frame != (video_path, frame_number):
+            return
+        scene = self.viewer.scene()
+        for kp_name, (x, y, v) in keypoints.items():
+            # Only fill joints that are still empty: points the user placed
+            # are kept, and so are interpolated ones, which rest on labelled
+            # frames on both sides
+            if kp_name in scene.keypoints:
+                continue
+            scene.set_keypoint(kp_name, x, y, v, provisional=True)
+            self.updateKeypointStatus(kp_name, True)
+        scene.refresh_dirty()
     
+    @timed()
     def saveAnnotations(self):
         if not self.output_dir:
             QMessageBox.warning(self, "Warning", "Please set output directory first!")
@@ -641,16 +1115,9 @@ class IntegratedPoseTool(QMainWindow):
         current_frame = int(frame_line.split(': ')[1])
         
         existing_annotation = None
-        existing_image = None
-        
-        for i, img in enumerate(self.annotations["images"]):
-            if (img["video_file"] == current_video and 
-                img["frame_number"] == current_frame):
-                existing_image = img
-                existing_annotation = next(
-                    (ann for ann in self.annotations["annotations"] 
-                    if ann["image_id"] == img["id"]), None)
-                break
+        existing_image = self.store.find_image(current_video, current_frame)
+        if existing_image:
+            existing_annotation = self.store.get_annotation(existing_image["id"])
                     
         if existing_annotation:
             reply = QMessageBox.question(self, 'Duplicate Frame',
@@ -664,13 +1131,7 @@ class IntegratedPoseTool(QMainWindow):
                 image_id = existing_image["id"]
                 
                 # Prepare keypoints from current scene
-                keypoints = []
-                for kp_name in self.pose_config.keypoint_names:
-                    if kp_name in self.viewer.scene().keypoints:
-                        x, y, v = self.viewer.scene().keypoints[kp_name]
-                        keypoints.extend([x, y, v])
-                    else:
-                        keypoints.extend([0, 0, 0])
+                keypoints = self.viewer.scene().keypoints.to_coco()
                 
                 # Calculate bbox from current scene
                 bbox = self.viewer.scene().calculate_bbox() or [0, 0, 0, 0]
@@ -687,12 +1148,12 @@ class IntegratedPoseTool(QMainWindow):
                 # Update image info timestamp
                 existing_image["date_captured"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
-                # Save to file
-                with open(os.path.join(self.output_dir, 'annotations.json'), 'w') as f:
-                    json.dump(self.annotations, f, indent=2)
-                
-                QMessageBox.information(self, "Success", 
-                                      f"Frame {current_frame} updated successfully!")
+                # Save to file; the status panel reports when it is on disk
+                self.writeAnnotations(existing_image, existing_annotation)
+                self.interpolator.update(existing_image.get("video_file"),
+                                         existing_image["frame_number"], keypoints)
+                # Completeness may have changed
+                self.frame_browser.add_image(existing_image)
                 return
             else:
                 return
@@ -702,15 +1163,20 @@ class IntegratedPoseTool(QMainWindow):
         os.makedirs(frames_dir, exist_ok=True)
         
         # For new annotation, get next available ID
-        image_id = max([img["id"] for img in self.annotations["images"]], default=0) + 1
+        image_id = self.store.next_image_id()
         
         frames_dir = os.path.join(self.output_dir, "frames")
         os.makedirs(frames_dir, exist_ok=True)
         
-        # Save current frame
-        filename = self.video_processor.save_frame(self.current_frame_number, frames_dir, image_id)
+        # Reuse the frame already decoded for display instead of decoding again
+        frame = None
+        if self.displayed_frame == (self.video_processor.video_path, self.current_frame_number):
+            frame = self.current_frame_bgr
+        if frame is None:
+            frame = self.video_processor.get_frame(self.current_frame_number)
         
-        if filename:
+        if frame is not None:
+            filename = VideoProcessor.frame_filename(image_id)
             # Create image info
             image_info = {
                 "id": image_id,
@@ -724,13 +1190,7 @@ class IntegratedPoseTool(QMainWindow):
             }
             
             # Prepare keypoints
-            keypoints = []
-            for kp_name in self.pose_config.keypoint_names:
-                if kp_name in self.viewer.scene().keypoints:
-                    x, y, v = self.viewer.scene().keypoints[kp_name]
-                    keypoints.extend([x, y, v])
-                else:
-                    keypoints.extend([0, 0, 0])
+            keypoints = self.viewer.scene().keypoints.to_coco()
             
             # Calculate bbox
             bbox = self.viewer.scene().calculate_bbox() or [0, 0, 0, 0]
@@ -738,7 +1198,7 @@ class IntegratedPoseTool(QMainWindow):
             
             # Create annotation
             annotation = {
-                "id": len(self.annotations["annotations"]) + 1,
+                "id": self.store.next_annotation_id(),
                 "image_id": image_id,
                 "category_id": 1,
                 "keypoints": keypoints,
@@ -751,51 +1211,111 @@ class IntegratedPoseTool(QMainWindow):
             }
             
             # Update annotations
-            self.annotations["images"].append(image_info)
-            self.annotations["annotations"].append(annotation)
+            self.store.add(image_info, annotation)
+            self.interpolator.update(image_info["video_file"], image_info["frame_number"],
+                                     keypoints)
             
-            # Save to file
-            with open(os.path.join(self.output_dir, 'annotations.json'), 'w') as f:
-                json.dump(self.annotations, f, indent=2)
+            # Save frame image and annotations in the background
+            self.writeAnnotations(image_info, annotation, frame)
             
             
-            # Update frame dropdown
-            self.updateFrameDropdown()
+            # Add the new frame to the browser and select it without
+            # triggering loadSelectedFrame twice
+            self.frame_browser.add_image(image_info)
+            self.frame_browser.select_image(image_id, notify=False)
+            self.filmstrip.add_annotated_frame(image_info["frame_number"])
             
             # Refresh the display
-            # Get the newly created/updated image ID
-            new_image_id = image_id  # This is already set for both new and existing annotations
-            
-            # Find the index in dropdown for this frame
-            for i in range(self.frame_dropdown.count()):
-                if self.frame_dropdown.itemData(i) == new_image_id:
-                    # Block signals temporarily to avoid triggering loadSelectedFrame twice
-                    self.frame_dropdown.blockSignals(True)
-                    self.frame_dropdown.setCurrentIndex(i)
-                    self.frame_dropdown.blockSignals(False)
-                    # Manually refresh the frame after setting index
-                    self.loadSelectedFrame(i)
-                    break
-    
-        
-            QMessageBox.information(self, "Success", 
-                                  f"Frame {current_frame} saved successfully!")
-            
-            self.frame_dropdown.setCurrentIndex(i)
-            
+            self.loadSelectedFrame(image_id)
+
+    def writeAnnotations(self, image_info, annotation, frame=None):
+        """Queue the frame JPEG (if given) and the annotation write"""
+        steps = []
+        # Everything the jobs need is captured here, not looked up on the worker
+        file_name = image_info["file_name"]
+        failed_frames = self.failed_frames
+        if frame is not None:
+            output_path = os.path.join(self.output_dir, "frames", file_name)
+            def write_frame_step():
+                try:
+                    if not write_frame(frame, output_path):
+                        raise OSError(f"could not encode {file_name}")
+                except OSError:
+                    failed_frames[id(image_info)] = image_info
+                    raise
+            steps.append(write_frame_step)
+        
+        annotation_file = os.path.join(self.output_dir, 'annotations.json')
+        # Journaled saves append one record instead of rewriting the dataset;
+        # the very first save still creates the snapshot the journal builds on
+        if not self.pose_config.journaled_save or not os.path.exists(annotation_file):
+            # Capture the records here and encode them on the worker
+            snapshot = self.store.snapshot()
+            sidecar = self.pose_config.pose_sidecar
+            # Only lazy keypoints of the GUI's store point into the old file
+            rewritten = self.snapshotRewritten.emit if self.store.lazy_spans else None
+            def write_snapshot():
+                # The snapshot may predate the undo of a frame that failed since
+                failed_ids = [image["id"] for image in snapshot[0]["images"]
+                              if id(image) in failed_frames]
+                store = AnnotationStore.from_snapshot(snapshot)
+                for failed_id in failed_ids:
+                    store.remove(failed_id)
+                store.save(annotation_file, sidecar)
+                if rewritten is not None:
+                    rewritten(annotation_file, *read_spans(annotation_file))
+            steps.append(write_snapshot)
+        else:
+            if self.journal is None or self.journal.annotation_file != annotation_file:
+                self.closeJournal()
+                self.journal = AnnotationJournal(
+                    annotation_file, self.pose_config.journal_compact_every,
+                    self.pose_config.pose_sidecar, self.snapshotRewritten.emit)
+            journal = self.journal
+            record = (dict(image_info), dict(annotation))
+            def append_record():
+                if id(image_info) in failed_frames:
+                    raise OSError(f"{file_name} was never written")
+                journal.append(*record)
+            steps.append(append_record)
+        
+        description = (f"Frame {image_info['frame_number']} (ID: {image_info['id']}) "
+                       f"from {image_info.get('video_file')}")
+        # A new frame that never reached the disk is taken back out of the project
+        undo = (lambda: self.undoNewFrame(image_info)) if frame is not None else None
+        self.save_worker.submit(description, steps, undo)
 
+    def undoNewFrame(self, image_info):
+        """Drop a newly saved frame whose write failed, keeping its keypoints on screen"""
+        self.store.remove(image_info["id"])
+        self.interpolator.update(image_info.get("video_file"), image_info["frame_number"], None)
+        self.frame_browser.remove_image(image_info)
+        self.updateFilmstripMarks()
+    
+    def closeJournal(self):
+        # Pending appends must reach the journal before it is compacted
+        self.save_worker.flush()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+    
     def resetSelectedKeypoint(self):
         current_keypoint = self.keypoint_list.currentItem().text()
         self.viewer.scene().reset_keypoint(current_keypoint)
         
     def resetCurrent(self):
-        self.viewer.scene().keypoints.clear()
-        self.viewer.scene().update_keypoint_visuals()
+        self.viewer.scene().clear_keypoints()
         for i in range(self.keypoint_list.count()):
             self.keypoint_list.item(i).setBackground(QColor(255, 255, 255))
             
     def closeEvent(self, event):
+        self.closeJournal()
+        self.save_worker.shutdown()
+        self.frame_prefetcher.stop()
+        self.keypoint_tracker.stop()
+        self.thumbnail_builder.stop()
         self.video_processor.close()
+        self.workspace.close()
         super().closeEvent(event)
 
 if __name__ == '__main__':
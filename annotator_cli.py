@@ -0,0 +1,382 @@
+"""Headless batch operations on annotation projects
+
+A project is an output directory as written by the annotation tool: an
+annotations.json file (plus its save journal, if any) and a frames/ folder.
+Nothing here imports PyQt5, so the commands run on machines without a
+display and start without the Qt import cost:
+
+    python -m annotator_cli extract PROJECT --video-dir VIDEOS
+    python -m annotator_cli export PROJECT -o annotations_clean.json --sidecar
+    python -m annotator_cli validate PROJECT --check-images --workers 8
+    python -m annotator_cli merge OUTPUT PROJECT [PROJECT ...]
+    python -m annotator_cli sample PROJECT VIDEO -n 50 --workers 8
+    python -m annotator_cli stats PROJECT
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+
+from pose_config import PoseConfig
+from video_processor import VideoProcessor
+from annotation_store import AnnotationStore, create_empty_annotations
+from pose_sidecar import PoseSidecar
+from frame_extraction import extract_frames
+from frame_sampling import FEATURES, scan_video, hash_images, propose_frames
+from worker_pool import run_tasks
+
+
+def annotation_path(project_dir):
+    return os.path.join(project_dir, "annotations.json")
+
+
+def frames_path(project_dir):
+    return os.path.join(project_dir, "frames")
+
+
+def load_project(project_dir, lazy_keypoints=True):
+    """Load a project's annotations, including journaled saves"""
+    path = annotation_path(project_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No annotations.json in {project_dir}")
+    return AnnotationStore.load(path, lazy_keypoints=lazy_keypoints)
+
+
+def find_video(video_file, video_dirs):
+    for video_dir in video_dirs:
+        path = os.path.join(video_dir, video_file)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# ---------------------------------------------------------------- extract
+
+def extract(args):
+    store = load_project(args.project)
+    frames_dir = frames_path(args.project)
+    os.makedirs(frames_dir, exist_ok=True)
+
+    requests = []
+    missing = 0
+    videos = {}
+    for image in store.images:
+        output_path = os.path.join(frames_dir, image["file_name"])
+        if not args.overwrite and os.path.exists(output_path):
+            continue
+        video_file = image.get("video_file")
+        if video_file not in videos:
+            videos[video_file] = find_video(video_file, args.video_dir) if video_file else None
+            if videos[video_file] is None:
+                print(f"error: source video {video_file!r} not found", file=sys.stderr)
+        if videos[video_file] is None:
+            missing += 1
+            continue
+        requests.append((videos[video_file], image["frame_number"], output_path))
+
+    report = extract_frames(requests, args.workers)
+    for video_path, frame_number, _ in report.failed:
+        print(f"error: could not extract frame {frame_number} of {video_path}",
+              file=sys.stderr)
+    if missing:
+        print(f"{missing} frames skipped because their video was not found", file=sys.stderr)
+    print(report)
+    return 1 if report.failed or missing else 0
+
+
+# ----------------------------------------------------------------- export
+
+def export(args):
+    store = load_project(args.project, lazy_keypoints=False)
+    output = args.output or annotation_path(args.project)
+    # Exporting in place also folds the save journal into the snapshot
+    store.save(output, sidecar=args.sidecar)
+    print(f"Exported {len(store.images)} images and {len(store.annotations)} "
+          f"annotations to {output}")
+    return 0
+
+
+# --------------------------------------------------------------- validate
+
+def _check_image(task):
+    path, width, height = task
+    frame = cv2.imread(path)
+    if frame is None:
+        return f"{path}: cannot be read"
+    if (width, height) != (frame.shape[1], frame.shape[0]):
+        return (f"{path}: is {frame.shape[1]}x{frame.shape[0]}, "
+                f"annotated as {width}x{height}")
+    return None
+
+
+def _keypoint_summary(keypoints):
+    """(value count, whether all visibility flags are valid, labeled count)"""
+    visibility = keypoints[2::3]
+    return (len(keypoints), all(v in (0, 1, 2) for v in visibility),
+            sum(1 for v in visibility if v > 0))
+
+
+def validate_project(project_dir, pose_config, check_images=False, workers=1):
+    """Return a list of problems found in a project"""
+    store = load_project(project_dir)
+    keypoint_count = len(pose_config.keypoint_names)
+    problems = []
+
+    # Keypoints still on disk are checked from the pose sidecar, for all
+    # rows at once, instead of being parsed out of the JSON
+    sidecar = store.sidecar
+    if sidecar is None or len(sidecar.keypoint_names) != keypoint_count:
+        store.materialize()
+    else:
+        visibility = sidecar.keypoints[:, :, 2]
+        flags_valid = np.isin(visibility, (0, 1, 2)).all(axis=1)
+        labeled_counts = np.count_nonzero(visibility > 0, axis=1)
+
+    categories = store.data.get("categories", [])
+    if not any(category.get("keypoints") == pose_config.keypoint_names
+               for category in categories):
+        problems.append("no category matches the configured keypoint names")
+
+    seen_ids = set()
+    seen_frames = {}
+    image_tasks = []
+    for image in store.images:
+        image_id = image["id"]
+        if image_id in seen_ids:
+            problems.append(f"image {image_id}: duplicate image id")
+        seen_ids.add(image_id)
+        frame_key = (image.get("video_file"), image.get("frame_number"))
+        if frame_key in seen_frames:
+            problems.append(f"image {image_id}: same video frame as image "
+                            f"{seen_frames[frame_key]}")
+        seen_frames.setdefault(frame_key, image_id)
+
+        path = os.path.join(frames_path(project_dir), image.get("file_name", ""))
+        if not os.path.isfile(path):
+            problems.append(f"image {image_id}: missing frame file {path}")
+        elif check_images:
+            image_tasks.append((path, image.get("width"), image.get("height")))
+        if image_id not in store.annotations_by_image:
+            problems.append(f"image {image_id}: has no annotation")
+
+    for annotation in store.annotations:
+        label = f"annotation {annotation.get('id')}"
+        if annotation.get("image_id") not in seen_ids:
+            problems.append(f"{label}: refers to unknown image {annotation.get('image_id')}")
+        row = None
+        if "keypoints" not in annotation and annotation.get("image_id") in store.lazy_spans:
+            row = sidecar.row_of(annotation["image_id"])
+        if row is not None:
+            length, valid, labeled = (int(sidecar.lengths[row]), bool(flags_valid[row]),
+                                      int(labeled_counts[row]))
+        else:
+            keypoints = annotation.get("keypoints")
+            if keypoints is None:
+                # Lazy, but not in the sidecar (e.g. its image is unknown)
+                keypoints = store.get_annotation(annotation["image_id"]).get("keypoints", [])
+            length, valid, labeled = _keypoint_summary(keypoints)
+        if length != keypoint_count * 3:
+            problems.append(f"{label}: has {length} keypoint values, "
+                            f"expected {keypoint_count * 3}")
+            continue
+        if not valid:
+            problems.append(f"{label}: visibility flags must be 0, 1 or 2")
+        if annotation.get("num_keypoints") != labeled:
+            problems.append(f"{label}: num_keypoints is {annotation.get('num_keypoints')}, "
+                            f"but {labeled} keypoints are labeled")
+
+    if image_tasks:
+        problems.extend(problem for problem in
+                        run_tasks(_check_image, image_tasks, workers, chunksize=64)
+                        if problem is not None)
+    return problems
+
+
+def validate(args):
+    problems = validate_project(args.project, PoseConfig(), args.check_images, args.workers)
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problems found")
+    return 1 if problems else 0
+
+
+# ------------------------------------------------------------------ merge
+
+def _copy_file(task):
+    source, destination = task
+    try:
+        shutil.copyfile(source, destination)
+    except OSError as e:
+        return f"could not copy {source}: {e}"
+    return None
+
+
+def merge(args):
+    pose_config = PoseConfig()
+    output_file = annotation_path(args.output)
+    if os.path.exists(output_file):
+        merged = load_project(args.output, lazy_keypoints=False)
+    else:
+        merged = AnnotationStore(create_empty_annotations(pose_config))
+    os.makedirs(frames_path(args.output), exist_ok=True)
+
+    copies = []
+    duplicates = 0
+    for project_dir in args.projects:
+        store = load_project(project_dir, lazy_keypoints=False)
+        for image in store.images:
+            annotation = store.get_annotation(image["id"])
+            if annotation is None:
+                continue
+            # Like saving in the GUI, a video frame is only annotated once
+            if merged.find_image(image.get("video_file"), image.get("frame_number")):
+                duplicates += 1
+                continue
+            image_id = merged.next_image_id()
+            filename = VideoProcessor.frame_filename(image_id)
+            copies.append((os.path.join(frames_path(project_dir), image["file_name"]),
+                           os.path.join(frames_path(args.output), filename)))
+            merged.add(dict(image, id=image_id, file_name=filename),
+                       dict(annotation, id=merged.next_annotation_id(), image_id=image_id))
+
+    errors = [error for error in run_tasks(_copy_file, copies, args.workers, chunksize=64)
+              if error is not None]
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+    merged.save(output_file)
+    print(f"Merged {len(copies)} frames into {args.output} "
+          f"({duplicates} duplicate frames skipped)")
+    return 1 if errors else 0
+
+
+# ----------------------------------------------------------------- sample
+
+def sample(args):
+    video_file = os.path.basename(args.video)
+    existing_frames = []
+    existing_paths = []
+    if os.path.exists(annotation_path(args.project)):
+        store = load_project(args.project)
+        for image in store.images:
+            if image.get("video_file") == video_file:
+                existing_frames.append(image["frame_number"])
+            path = os.path.join(frames_path(args.project), image.get("file_name", ""))
+            if os.path.isfile(path):
+                existing_paths.append(path)
+
+    workers = args.workers or os.cpu_count() or 1
+    features = scan_video(args.video, args.step, args.features, workers=workers)
+    existing_hashes = hash_images(existing_paths, workers)
+    frames = propose_frames(features, args.count, existing_frames, existing_hashes,
+                            args.duplicate_distance, seed=args.seed)
+    for frame_number in frames:
+        print(frame_number)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"video_file": video_file, "frames": frames}, f, indent=2)
+    print(f"Proposed {len(frames)} of {len(features)} scanned frames "
+          f"({len(existing_frames)} frames of this video already annotated, "
+          f"scan took {features.seconds:.1f}s)", file=sys.stderr)
+    return 0
+
+
+# ------------------------------------------------------------------ stats
+
+def stats(args):
+    sidecar = PoseSidecar.open(annotation_path(args.project))
+    if sidecar is None or sidecar.journal:
+        # Missing, out of date or behind the journal: build the same arrays
+        sidecar = PoseSidecar.build(load_project(args.project, lazy_keypoints=False))
+    complete = sidecar.lengths == len(sidecar.keypoint_names) * 3
+    visibility = sidecar.keypoints[complete, :, 2]
+    print(f"{len(sidecar)} images from {len(sidecar.video_files)} videos, "
+          f"{np.count_nonzero(complete)} with keypoints")
+    frames_per_video = np.bincount(sidecar.videos[sidecar.videos >= 0],
+                                   minlength=len(sidecar.video_files))
+    for video_file, count in zip(sidecar.video_files, frames_per_video.tolist()):
+        print(f"  {video_file}: {count} frames")
+    if len(visibility):
+        print("Labeled keypoints (visible / estimated):")
+        visible = np.count_nonzero(visibility == 2, axis=0) * 100 / len(visibility)
+        estimated = np.count_nonzero(visibility == 1, axis=0) * 100 / len(visibility)
+        for name, v, e in zip(sidecar.keypoint_names, visible.tolist(), estimated.tolist()):
+            print(f"  {name}: {v + e:.1f}% ({v:.1f}% / {e:.1f}%)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="annotator_cli", description="Batch operations on annotation projects")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_workers(subparser):
+        subparser.add_argument("--workers", type=int, default=None,
+                               help="number of worker processes (default: one per CPU)")
+
+    p = subparsers.add_parser("extract", help="write frames/*.jpg from the source videos")
+    p.add_argument("project")
+    p.add_argument("--video-dir", action="append", default=[], required=True,
+                   help="directory holding the source videos (repeatable)")
+    p.add_argument("--overwrite", action="store_true",
+                   help="rewrite frames that already exist")
+    add_workers(p)
+    p.set_defaults(func=extract)
+
+    p = subparsers.add_parser("export", help="write a clean annotations.json snapshot")
+    p.add_argument("project")
+    p.add_argument("-o", "--output", help="output file (default: in place)")
+    p.add_argument("--sidecar", action="store_true",
+                   help="also write the binary pose file (OUTPUT.poses)")
+    p.set_defaults(func=export)
+
+    p = subparsers.add_parser("validate", help="check a project for inconsistencies")
+    p.add_argument("project")
+    p.add_argument("--check-images", action="store_true",
+                   help="decode every frame and compare its size")
+    add_workers(p)
+    p.set_defaults(func=validate)
+
+    p = subparsers.add_parser("merge", help="merge projects into OUTPUT")
+    p.add_argument("output")
+    p.add_argument("projects", nargs="+")
+    add_workers(p)
+    p.set_defaults(func=merge)
+
+    p = subparsers.add_parser("sample", help="propose diverse frames of a video to annotate")
+    p.add_argument("project")
+    p.add_argument("video")
+    p.add_argument("-n", "--count", type=int, default=50,
+                   help="number of frames to propose (default: 50)")
+    p.add_argument("--step", type=int, default=5,
+                   help="scan every STEP-th frame (default: 5)")
+    p.add_argument("--features", choices=FEATURES, default="pixels",
+                   help="clustering features (default: pixels)")
+    p.add_argument("--duplicate-distance", type=int, default=6,
+                   help="hash bits within which a frame counts as a near duplicate "
+                        "of one already in the project (default: 6)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("-o", "--output", help="also write the proposal as JSON")
+    add_workers(p)
+    p.set_defaults(func=sample)
+
+    p = subparsers.add_parser("stats", help="summarize frames per video and labeled keypoints")
+    p.add_argument("project")
+    p.set_defaults(func=stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
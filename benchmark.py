@@ -0,0 +1,413 @@
+"""Latency benchmarks for the decode, render and save hot paths
+
+Synthetic videos and annotation sets are generated locally, so runs are
+reproducible on any machine. The GUI paths are driven through a real
+IntegratedPoseTool on Qt's offscreen platform. Results are printed as JSON
+with p50/p95/p99 latencies (milliseconds) and throughput per benchmark:
+
+    python benchmark.py                          # 1k, 10k and 100k frames
+    python benchmark.py --sizes 1000 --samples 100 -o bench_output.txt
+    python benchmark.py --workdir bench_data     # keep and reuse the data
+
+Compare the JSON of two runs to catch regressions before a release.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+
+from pose_config import PoseConfig
+from frame_cache import FrameCache
+from pose import Pose
+from video_processor import VideoProcessor
+from annotation_store import AnnotationStore, create_empty_annotations
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+SCRUB_MAX_STEP = 5
+
+
+def summarize(samples):
+    """Percentiles (ms) and throughput of a list of durations in seconds"""
+    samples = np.asarray(samples, dtype=np.float64)
+    if not len(samples):
+        return {"count": 0}
+    total = samples.sum()
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99)) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(samples.mean() * 1000, 3),
+        "max_ms": round(samples.max() * 1000, 3),
+        "throughput_per_s": round(len(samples) / total, 2) if total > 0 else None
+    }
+
+
+def time_calls(func, args):
+    """Call func once per item of args and return the durations"""
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ---------------------------------------------------------------- synthetic data
+
+def make_video(path, frame_count, width, height, fps=30):
+    """Write a video whose frames all differ, so the decoder cannot skip work"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise OSError(f"cannot write {path}")
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 256, (height, width * 2, 3), dtype=np.uint8)
+    texture = cv2.GaussianBlur(texture, (0, 0), 3)
+    try:
+        for n in range(frame_count):
+            # A panning texture plus a moving block and the frame number
+            offset = (n * 4) % width
+            frame = np.ascontiguousarray(texture[:, offset:offset + width])
+            x = (n * 7) % max(1, width - 80)
+            cv2.rectangle(frame, (x, height // 3), (x + 80, height // 3 + 80), (0, 0, 255), -1)
+            cv2.putText(frame, str(n), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2,
+                        (255, 255, 255), 3)
+            writer.write(frame)
+    finally:
+        writer.release()
+
+
+def random_pose(rng, keypoint_count, width, height):
+    """Flat COCO keypoint list around a random centre; about 10% unlabelled"""
+    centre = rng.uniform((width * 0.2, height * 0.2), (width * 0.8, height * 0.8))
+    xy = centre + rng.normal(0, min(width, height) * 0.1, (keypoint_count, 2))
+    xy = np.clip(xy, 0, (width - 1, height - 1))
+    v = rng.choice((0, 1, 2), keypoint_count, p=(0.1, 0.2, 0.7))
+    keypoints = []
+    for (x, y), visibility in zip(np.round(xy, 2).tolist(), v.tolist()):
+        keypoints.extend((x, y, visibility) if visibility else (0, 0, 0))
+    return keypoints
+
+
+def make_annotations(pose_config, image_count, width, height, frames_per_video=1000):
+    """AnnotationStore with image_count annotated frames spread over several videos"""
+    rng = np.random.default_rng(image_count)
+    store = AnnotationStore(create_empty_annotations(pose_config))
+    keypoint_count = len(pose_config.keypoint_names)
+    for i in range(image_count):
+        image_id = i + 1
+        keypoints = random_pose(rng, keypoint_count, width, height)
+        store.add({
+            "id": image_id,
+            "file_name": VideoProcessor.frame_filename(image_id),
+            "video_file": f"synthetic_{i // frames_per_video:04d}.mp4",
+            "frame_number": i % frames_per_video,
+            "width": width,
+            "height": height,
+            "fps": 30.0,
+            "date_captured": "2024-01-01 00:00:00"
+        }, {
+            "id": image_id,
+            "image_id": image_id,
+            "category_id": 1,
+            "keypoints": keypoints,
+            "num_keypoints": sum(1 for v in keypoints[2::3] if v > 0),
+            "bbox": [0, 0, 0, 0],
+            "area": 0,
+            "iscrowd": 0,
+            "segmentation": [],
+            "score": 1.0
+        })
+    return store
+
+
+def prepare_data(workdir, sizes, video_frames, width, height, pose_config, log):
+    """Generate (or reuse) the videos and annotation files under workdir"""
+    videos = {}
+    for frame_count in sorted({min(size, video_frames) for size in sizes}):
+        path = os.path.join(workdir, f"video_{frame_count}_{width}x{height}.mp4")
+        if not os.path.exists(path):
+            log(f"Writing {frame_count}-frame video {path}")
+            make_video(path, frame_count, width, height)
+        videos[frame_count] = path
+
+    annotation_files = {}
+    for size in sizes:
+        path = os.path.join(workdir, f"annotations_{size}.json")
+        if not os.path.exists(path):
+            log(f"Writing {size}-frame annotation set {path}")
+            make_annotations(pose_config, size, width, height).save(path)
+        annotation_files[size] = path
+    return videos, annotation_files
+
+
+# ---------------------------------------------------------------- access patterns
+
+def access_pattern(name, frame_count, samples, rng):
+    """Frame numbers requested by sequential, random or scrub navigation"""
+    if name == "sequential":
+        return [n % frame_count for n in range(samples)]
+    if name == "random":
+        return rng.integers(0, frame_count, samples).tolist()
+    if name == "scrub":
+        # Dragging back and forth: short steps that change direction now and then
+        frames = []
+        position = frame_count // 2
+        direction = 1
+        for _ in range(samples):
+            if rng.random() < 0.05:
+                direction = -direction
+            position += direction * int(rng.integers(1, SCRUB_MAX_STEP + 1))
+            if not 0 <= position < frame_count:
+                direction = -direction
+                position = min(max(position, 0), frame_count - 1)
+            frames.append(position)
+        return frames
+    raise ValueError(f"Unknown access pattern {name!r}")
+
+
+# ---------------------------------------------------------------- benchmarks
+
+def bench_decode(video_path, samples, use_index, rng):
+    """VideoProcessor.get_frame per access pattern, uncached and with the frame cache"""
+    results = {}
+    runs = [("sequential", 0), ("random", 0), ("scrub", 0), ("scrub", None)]
+    for pattern, cache_bytes in runs:
+        cache = FrameCache() if cache_bytes is None else FrameCache(cache_bytes)
+        processor = VideoProcessor(cache)
+        processor.load_video(video_path, use_index)
+        frames = access_pattern(pattern, processor.total_frames, samples, rng)
+        samples_s = time_calls(processor.get_frame, frames)
+        processor.close()
+        key = pattern if cache_bytes is not None else pattern + "_cached"
+        results[key] = summarize(samples_s)
+        if cache_bytes is None:
+            results[key]["cache_hit_rate"] = round(cache.stats()["hit_rate"], 3)
+    return results
+
+
+def create_tool(pose_config):
+    from PyQt5.QtWidgets import QApplication
+    from annotator import IntegratedPoseTool
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    tool = IntegratedPoseTool(pose_config)
+    tool.show()
+    app.processEvents()
+    return app, tool
+
+
+def open_video(tool, video_path):
+    tool.video_processor.video_file = os.path.basename(video_path)
+    tool.video_processor.load_video(video_path, tool.pose_config.use_keyframe_index)
+    tool.frame_slider.setMaximum(tool.video_processor.total_frames - 1)
+    tool.frame_spinbox.setMaximum(tool.video_processor.total_frames - 1)
+
+
+def bench_render(tool, video_path, samples, rng):
+    """displayFrame, repainting it, and KeypointScene.update_keypoint_visuals"""
+    open_video(tool, video_path)
+    processor = tool.video_processor
+    width, height = processor.frame_width, processor.frame_height
+    keypoint_count = len(tool.pose_config.keypoint_names)
+    frames = [processor.get_frame(n)
+              for n in access_pattern("random", processor.total_frames, min(samples, 50), rng)]
+    annotations = [{"keypoints": random_pose(rng, keypoint_count, width, height)}
+                   for _ in range(samples)]
+
+    scene = tool.viewer.scene()
+    viewport = tool.viewer.viewport()
+    display, paint, visuals, drag = [], [], [], []
+    for i, annotation in enumerate(annotations):
+        frame = frames[i % len(frames)]
+        start = time.perf_counter()
+        tool.displayFrame(frame, annotation)
+        display.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        viewport.repaint()
+        paint.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scene.update_keypoint_visuals()
+        visuals.append(time.perf_counter() - start)
+
+        # Dragging one keypoint redraws only what it touches
+        kp_name = tool.pose_config.keypoint_names[i % keypoint_count]
+        x, y = rng.uniform((0, 0), (width, height)).tolist()
+        start = time.perf_counter()
+        scene.set_keypoint(kp_name, x, y, 2)
+        scene.refresh_dirty()
+        drag.append(time.perf_counter() - start)
+    return {
+        "displayFrame": summarize(display),
+        "repaint": summarize(paint),
+        "update_keypoint_visuals": summarize(visuals),
+        "keypoint_drag": summarize(drag)
+    }
+
+
+def bench_save(tool, app, video_path, annotation_file, workdir, samples, journaled, rng):
+    """saveAnnotations of new frames into a copy of an annotation set
+
+    Reports the GUI-thread cost of the call and the time until the save
+    worker has made the write durable.
+    """
+    project_dir = os.path.join(workdir, "project")
+    shutil.rmtree(project_dir, ignore_errors=True)
+    os.makedirs(os.path.join(project_dir, "frames"))
+    project_file = os.path.join(project_dir, "annotations.json")
+    shutil.copyfile(annotation_file, project_file)
+
+    tool.closeJournal()
+    tool.pose_config.journaled_save = journaled
+    tool.output_dir = project_dir
+    start = time.perf_counter()
+    tool.store = AnnotationStore.load(project_file)
+    load_seconds = time.perf_counter() - start
+    tool.interpolator.set_store(tool.store)
+    start = time.perf_counter()
+    tool.updateFrameDropdown()
+    dropdown_seconds = time.perf_counter() - start
+
+    open_video(tool, video_path)
+    processor = tool.video_processor
+    keypoint_count = len(tool.pose_config.keypoint_names)
+    frame_numbers = rng.permutation(processor.total_frames)[:samples].tolist()
+    gui, durable = [], []
+    for frame_number in frame_numbers:
+        frame = processor.get_frame(frame_number)
+        tool.current_frame_number = frame_number
+        tool.showVideoFrame(frame_number, frame)
+        scene = tool.viewer.scene()
+        scene.set_keypoints(Pose.from_coco(scene.layout, random_pose(
+            rng, keypoint_count, processor.frame_width, processor.frame_height)))
+
+        start = time.perf_counter()
+        tool.saveAnnotations()
+        gui.append(time.perf_counter() - start)
+        tool.save_worker.flush()
+        durable.append(time.perf_counter() - start)
+        # Deliver the worker's status messages like the event loop would
+        app.processEvents()
+    tool.closeJournal()
+    return {
+        "load_s": round(load_seconds, 3),
+        "updateFrameDropdown_s": round(dropdown_seconds, 3),
+        "saveAnnotations": summarize(gui),
+        "save_durable": summarize(durable)
+    }
+
+
+def run(args, log):
+    pose_config = PoseConfig()
+    rng = np.random.default_rng(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pose_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        videos, annotation_files = prepare_data(
+            workdir, args.sizes, args.video_frames, args.width, args.height, pose_config, log)
+        results = {
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "opencv": cv2.__version__,
+                "numpy": np.__version__
+            },
+            "config": {
+                "sizes": args.sizes,
+                "video_frames": args.video_frames,
+                "resolution": [args.width, args.height],
+                "samples": args.samples,
+                "save_samples": args.save_samples,
+                "keyframe_index": pose_config.use_keyframe_index,
+                "seed": args.seed
+            },
+            "decode": {},
+            "render": {},
+            "save": {}
+        }
+        for frame_count, video_path in videos.items():
+            log(f"Decoding {frame_count}-frame video")
+            results["decode"][str(frame_count)] = bench_decode(
+                video_path, args.samples, pose_config.use_keyframe_index, rng)
+        if args.skip_gui:
+            return results
+
+        app, tool = create_tool(pose_config)
+        try:
+            from PyQt5.QtCore import PYQT_VERSION_STR
+            results["environment"]["pyqt"] = PYQT_VERSION_STR
+            video_path = videos[max(videos)]
+            log("Rendering")
+            results["render"] = bench_render(tool, video_path, args.samples, rng)
+            for size, annotation_file in annotation_files.items():
+                for journaled in (True, False):
+                    mode = "journaled" if journaled else "snapshot"
+                    # Every snapshot save rewrites the whole file, so sample less
+                    samples = args.save_samples if journaled else max(1, args.save_samples // 10)
+                    log(f"Saving into {size} annotations ({mode})")
+                    results["save"].setdefault(str(size), {})[mode] = bench_save(
+                        tool, app, video_path, annotation_file, workdir, samples, journaled, rng)
+        finally:
+            tool.close()
+        return results
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="benchmark", description="Benchmark the decode, render and save hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="annotated frames per synthetic data set (default: 1000 10000 100000)")
+    parser.add_argument("--video-frames", type=int, default=10000,
+                        help="cap on the length of the synthetic videos (default: 10000)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--samples", type=int, default=500,
+                        help="calls per decode and render benchmark (default: 500)")
+    parser.add_argument("--save-samples", type=int, default=50,
+                        help="journaled saves per annotation set (default: 50)")
+    parser.add_argument("--skip-gui", action="store_true",
+                        help="only run the decode benchmarks")
+    parser.add_argument("--workdir",
+                        help="keep generated data here and reuse it (default: temporary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON report here as well")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    try:
+        results = run(args, log)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+
+from tiled_image import frame_to_qimage
+
+TIMELINE_HEIGHT = 10
+SLOT_GAP = 2
+
+BACKGROUND_COLOR = QColor(30, 30, 30)
+EMPTY_SLOT_COLOR = QColor(60, 60, 60)
+ANNOTATED_COLOR = QColor(0, 200, 0)
+CURRENT_COLOR = QColor(255, 215, 0)
+
+
+class Filmstrip(QWidget):
+    """Thumbnails around the current frame above a timeline of the whole video
+
+    Thumbnails are painted straight from a ThumbnailAtlas, so pressing and
+    dragging over the strip only emits framePreviewed and never decodes;
+    frameSelected is emitted on release. Thumbnails covering an annotated
+    frame get a green bar, and the timeline marks every annotated frame.
+    Without an atlas the timeline still works on its own.
+    """
+    framePreviewed = pyqtSignal(int)
+    frameSelected = pyqtSignal(int)
+
+    def __init__(self, thumbnail_height=54, parent=None):
+        super().__init__(parent)
+        self.atlas = None
+        self.total_frames = 0
+        self.current_frame = 0
+        self.annotated = np.zeros(0, dtype=np.int64)  # Sorted frame numbers
+        # Thumbnail index kept in the middle while the mouse is held down, so
+        # the strip does not slide away under the cursor
+        self._drag_center = None
+        self._in_timeline = False
+        self._pressed_frame = None  # current_frame when the mouse went down
+        self._previewed = False  # Whether the held mouse has previewed another frame
+        self.setFixedHeight(thumbnail_height + TIMELINE_HEIGHT + 3 * SLOT_GAP)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_video(self, total_frames):
+        """Reset for a newly selected video; its atlas arrives via set_atlas"""
+        self.atlas = None
+        self.total_frames = total_frames
+        self.current_frame = 0
+        self.update()
+
+    def set_atlas(self, atlas):
+        self.atlas = atlas
+        self.update()
+
+    def set_current_frame(self, frame_number):
+        if frame_number != self.current_frame:
+            self.current_frame = frame_number
+            self.update()
+
+    def set_annotated_frames(self, frame_numbers):
+        self.annotated = np.unique(np.asarray(list(frame_numbers), dtype=np.int64))
+        self.update()
+
+    def add_annotated_frame(self, frame_number):
+        if not self._annotated_between(frame_number, frame_number + 1):
+            self.annotated = np.insert(
+                self.annotated, np.searchsorted(self.annotated, frame_number), frame_number)
+            self.update()
+
+    def thumbnail(self, frame_number):
+        """BGR thumbnail of frame_number from the atlas, or None"""
+        if self.atlas is None:
+            return None
+        return self.atlas.thumbnail(frame_number)
+
+    def thumbnail_frame(self, frame_number):
+        """Frame that the thumbnail of frame_number was taken from"""
+        return self.atlas.frame_of(self.atlas.index_of(frame_number))
+
+    def _annotated_between(self, start, stop):
+        left, right = np.searchsorted(self.annotated, (start, stop))
+        return right > left
+
+    # ---------------------------------------------------------------- layout
+
+    def _strip_rect(self):
+        return QRect(0, SLOT_GAP, self.width(),
+                     self.height() - TIMELINE_HEIGHT - 3 * SLOT_GAP)
+
+    def _timeline_rect(self):
+        return QRect(0, self.height() - TIMELINE_HEIGHT - SLOT_GAP,
+                     self.width(), TIMELINE_HEIGHT)
+
+    def _slots(self):
+        """(thumbnail index, QRect) of every visible slot"""
+        if self.atlas is None:
+            return []
+        strip = self._strip_rect()
+        slot_width = max(1, round(strip.height() * self.atlas.width / self.atlas.height))
+        slot_count = max(1, self.width() // (slot_width + SLOT_GAP))
+        center = self._drag_center
+        if center is None:
+            center = self.atlas.index_of(self.current_frame)
+        first = center - slot_count // 2
+        # Center the slot of the current thumbnail in the widget
+        x0 = (self.width() - slot_width) // 2 - (slot_count // 2) * (slot_width + SLOT_GAP)
+        slots = []
+        for i in range(slot_count):
+            index = first + i
+            if 0 <= index < self.atlas.count:
+                slots.append((index, QRect(x0 + i * (slot_width + SLOT_GAP), strip.top(),
+                                           slot_width, strip.height())))
+        return slots
+
+    def _frame_at(self, pos):
+        if self._in_timeline or self.atlas is None:
+            if self.total_frames <= 0:
+                return None
+            fraction = min(max(pos.x() / max(1, self.width() - 1), 0.0), 1.0)
+            return int(round(fraction * (self.total_frames - 1)))
+        for index, rect in self._slots():
+            if rect.left() <= pos.x() <= rect.right() + SLOT_GAP:
+                return min(self.atlas.frame_of(index), max(0, self.total_frames - 1))
+        return None
+
+    # ---------------------------------------------------------------- painting
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND_COLOR)
+        current_index = None if self.atlas is None else self.atlas.index_of(self.current_frame)
+
+        for index, rect in self._slots():
+            thumbnail = self.atlas.pixels[index] if self.atlas.built[index] else None
+            if thumbnail is None:
+                painter.fillRect(rect, EMPTY_SLOT_COLOR)
+            else:
+                painter.drawImage(rect, frame_to_qimage(thumbnail))
+            first_frame = self.atlas.frame_of(index)
+            if self._annotated_between(first_frame, first_frame + self.atlas.stride):
+                painter.fillRect(QRect(rect.left(), rect.bottom() - 3, rect.width(), 4),
+                                 ANNOTATED_COLOR)
+            if index == current_index:
+                painter.setPen(QPen(CURRENT_COLOR, 2))
+                painter.drawRect(rect.adjusted(1, 1, -1, -1))
+
+        timeline = self._timeline_rect()
+        painter.fillRect(timeline, EMPTY_SLOT_COLOR)
+        if self.total_frames > 1:
+            scale = (timeline.width() - 1) / (self.total_frames - 1)
+            painter.setPen(QPen(ANNOTATED_COLOR, 1))
+            # One line per pixel column is enough however many frames there are
+            for x in np.unique(np.round(self.annotated * scale).astype(int)).tolist():
+                painter.drawLine(x, timeline.top(), x, timeline.bottom())
+            x = int(round(self.current_frame * scale))
+            painter.fillRect(QRect(x - 1, timeline.top(), 3, timeline.height()), CURRENT_COLOR)
+        painter.end()
+
+    # ---------------------------------------------------------------- mouse
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return
+        self._in_timeline = event.pos().y() >= self._timeline_rect().top()
+        self._pressed_frame = self.current_frame
+        self._previewed = False
+        if self.atlas is not None:
+            self._drag_center = self.atlas.index_of(self.current_frame)
+        self._preview(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._preview(event.pos())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return
+        frame_number = self._frame_at(event.pos())
+        if frame_number is None:
+            frame_number = self.current_frame
+        self._drag_center = None
+        self._in_timeline = False
+        self.update()
+        # Reloading the frame that is already shown would drop unsaved edits;
+        # after previews, the shown frame has to be restored though
+        if frame_number != self._pressed_frame or self._previewed:
+            self.frameSelected.emit(frame_number)
+
+    def _preview(self, pos):
+        frame_number = self._frame_at(pos)
+        if frame_number is not None and frame_number != self.current_frame:
+            self.current_frame = frame_number
+            self._previewed = True
+            self.framePreviewed.emit(frame_number)
+            self.update()
+
+    def wheelEvent(self, event):
+        # One notch moves by one thumbnail
+        step = self.atlas.stride if self.atlas is not None else 1
+        direction = -1 if event.angleDelta().y() > 0 else 1
+        frame_number = min(max(self.current_frame + direction * step, 0),
+                           max(0, self.total_frames - 1))
+        if frame_number != self.current_frame:
+            self.frameSelected.emit(frame_number)
@@ -0,0 +1,236 @@
+import bisect
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QListView
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel,
+                          pyqtSignal)
+
+# Custom item data roles
+ImageIdRole = Qt.UserRole
+VideoRole = Qt.UserRole + 1
+FrameNumberRole = Qt.UserRole + 2
+CompleteRole = Qt.UserRole + 3
+
+ALL_VIDEOS = "All videos"
+COMPLETENESS_FILTERS = ["All frames", "Complete", "Incomplete"]
+
+
+def _sort_key(image):
+    return (image.get("video_file") or "", image.get("frame_number", 0), image["id"])
+
+
+class FrameListModel(QAbstractListModel):
+    """One row per annotated image, read straight from an AnnotationStore
+
+    Rows hold references to the store's image records, so the model costs a
+    list entry per image and no Qt items. Rows are kept sorted by video and
+    frame number, so saves insert or refresh single rows in place and the
+    proxy never has to sort.
+    """
+    videoAdded = pyqtSignal(str)
+
+    def __init__(self, keypoint_count, parent=None):
+        super().__init__(parent)
+        self.keypoint_count = keypoint_count
+        self.store = None
+        self._images = []
+        self._keys = []  # _sort_key of every row, for bisecting
+        self._complete = []  # CompleteRole of every row, for filtering
+        self.videos = set()
+
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        keys = [_sort_key(image) for image in store.images]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._images = [store.images[i] for i in order]
+        self._keys = [keys[i] for i in order]
+        self._complete = [self._is_complete(image) for image in self._images]
+        self.videos = set()
+        self.endResetModel()
+        for image in self._images:
+            self._track_video(image)
+
+    def add_image(self, image):
+        """Insert a newly saved image, or refresh it if it is already listed"""
+        key = _sort_key(image)
+        row = bisect.bisect_left(self._keys, key)
+        if row < len(self._keys) and self._keys[row] == key:
+            self._complete[row] = self._is_complete(image)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._images.insert(row, image)
+        self._keys.insert(row, key)
+        self._complete.insert(row, self._is_complete(image))
+        self.endInsertRows()
+        self._track_video(image)
+
+    def remove_image(self, image):
+        row = self.row_of_key(_sort_key(image))
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._images[row], self._keys[row], self._complete[row]
+        self.endRemoveRows()
+
+    def _is_complete(self, image):
+        # num_keypoints is stored next to the keypoints, so this does not
+        # force lazily loaded keypoint lists into memory
+        annotation = self.store.annotations_by_image.get(image["id"])
+        return (annotation is not None and
+                annotation.get("num_keypoints", 0) >= self.keypoint_count)
+
+    def _track_video(self, image):
+        video = image.get("video_file")
+        if video is not None and video not in self.videos:
+            self.videos.add(video)
+            self.videoAdded.emit(video)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._images)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        image = self._images[index.row()]
+        if role == Qt.DisplayRole:
+            return (f"Frame {image['frame_number']} (ID: {image['id']}) - "
+                    f"{image.get('video_file', 'N/A')}")
+        if role == ImageIdRole:
+            return image["id"]
+        if role == VideoRole:
+            return image.get("video_file")
+        if role == FrameNumberRole:
+            return image.get("frame_number", 0)
+        if role == CompleteRole:
+            return self._complete[index.row()]
+        return None
+
+    def row_of(self, image_id):
+        image = self.store.get_image(image_id) if self.store is not None else None
+        return None if image is None else self.row_of_key(_sort_key(image))
+
+    def row_of_key(self, key):
+        row = bisect.bisect_left(self._keys, key)
+        return row if row < len(self._keys) and self._keys[row] == key else None
+
+    def video_at(self, row):
+        return self._keys[row][0] or None
+
+    def complete_at(self, row):
+        return self._complete[row]
+
+
+class FrameFilterProxyModel(QSortFilterProxyModel):
+    """Filters rows by video and completeness; the source rows are already sorted"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.video_filter = None
+        self.completeness_filter = None  # None, True or False
+
+    def set_video_filter(self, video):
+        self.video_filter = video
+        # invalidate() re-filters behind one layoutChanged; invalidateFilter()
+        # announces every removed run of rows, thousands of them for a
+        # scattered filter like completeness
+        self.invalidate()
+
+    def set_completeness_filter(self, complete):
+        self.completeness_filter = complete
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # Reads the model's per-row lists; going through data() costs an
+        # index and a QVariant round trip per row
+        model = self.sourceModel()
+        if self.video_filter is not None and model.video_at(source_row) != self.video_filter:
+            return False
+        if (self.completeness_filter is not None and
+            model.complete_at(source_row) != self.completeness_filter):
+            return False
+        return True
+
+
+class FrameBrowser(QWidget):
+    """Virtualized list of annotated frames with video/completeness filters"""
+    imageSelected = pyqtSignal(int)
+
+    def __init__(self, keypoint_count, parent=None):
+        super().__init__(parent)
+        self.model = FrameListModel(keypoint_count, self)
+        self.proxy = FrameFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        filters = QHBoxLayout()
+        self.video_combo = QComboBox()
+        self.video_combo.addItem(ALL_VIDEOS)
+        self.video_combo.currentTextChanged.connect(self._onVideoFilterChanged)
+        filters.addWidget(self.video_combo)
+        self.completeness_combo = QComboBox()
+        self.completeness_combo.addItems(COMPLETENESS_FILTERS)
+        self.completeness_combo.currentIndexChanged.connect(self._onCompletenessChanged)
+        filters.addWidget(self.completeness_combo)
+        layout.addLayout(filters)
+
+        self.list_view = QListView()
+        # Uniform rows let the view lay out only what is visible
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.proxy)
+        self.list_view.setMaximumHeight(150)
+        self.list_view.selectionModel().currentChanged.connect(self._onCurrentChanged)
+        layout.addWidget(self.list_view)
+
+        self.model.videoAdded.connect(self.video_combo.addItem)
+
+    def set_store(self, store):
+        self.video_combo.blockSignals(True)
+        self.video_combo.clear()
+        self.video_combo.addItem(ALL_VIDEOS)
+        self.video_combo.blockSignals(False)
+        self.proxy.set_video_filter(None)
+        self.model.set_store(store)
+
+    def add_image(self, image):
+        self.model.add_image(image)
+
+    def remove_image(self, image):
+        """Drop image from the list without loading the row that takes its place"""
+        selection = self.list_view.selectionModel()
+        was_current = self.list_view.currentIndex().data(ImageIdRole) == image["id"]
+        selection.blockSignals(True)
+        self.model.remove_image(image)
+        if was_current:
+            selection.clearCurrentIndex()
+            selection.clearSelection()
+        selection.blockSignals(False)
+
+    def select_image(self, image_id, notify=True):
+        """Make image_id the current row, clearing filters that hide it"""
+        row = self.model.row_of(image_id)
+        if row is None:
+            return
+        proxy_index = self.proxy.mapFromSource(self.model.index(row))
+        if not proxy_index.isValid():
+            self.video_combo.setCurrentIndex(0)
+            self.completeness_combo.setCurrentIndex(0)
+            proxy_index = self.proxy.mapFromSource(self.model.index(row))
+        self.list_view.blockSignals(not notify)
+        self.list_view.selectionModel().blockSignals(not notify)
+        self.list_view.setCurrentIndex(proxy_index)
+        self.list_view.selectionModel().blockSignals(False)
+        self.list_view.blockSignals(False)
+        self.list_view.scrollTo(proxy_index)
+
+    def _onVideoFilterChanged(self, text):
+        self.proxy.set_video_filter(None if text in ("", ALL_VIDEOS) else text)
+
+    def _onCompletenessChanged(self, index):
+        self.proxy.set_completeness_filter({1: True, 2: False}.get(index))
+
+    def _onCurrentChanged(self, current, previous):
+        if current.isValid():
+            self.imageSelected.emit(current.data(ImageIdRole))
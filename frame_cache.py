@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """LRU cache of decoded frames keyed by (video_path, frame_number)
+
+    Entries are evicted least-recently-used first once the total size of the
+    cached arrays exceeds ``max_bytes``. The cache is shared between the GUI
+    thread and the prefetch thread, so every access takes a lock.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_path, frame_number):
+        """Return the cached frame or None, marking it as most recently used"""
+        key = (video_path, frame_number)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, video_path, frame_number, frame):
+        """Store a decoded frame, evicting old frames to stay within budget"""
+        if frame is None or frame.nbytes > self.max_bytes:
+            return
+        key = (video_path, frame_number)
+        # Cached arrays are shared with every caller, so keep them read-only
+        frame.flags.writeable = False
+        with self._lock:
+            if key in self._frames:
+                self.current_bytes -= self._frames.pop(key).nbytes
+            self._frames[key] = frame
+            self.current_bytes += frame.nbytes
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+    def clear(self, video_path=None):
+        """Drop all frames, or only the frames of one video"""
+        with self._lock:
+            if video_path is None:
+                self._frames.clear()
+                self.current_bytes = 0
+                return
+            for key in [k for k in self._frames if k[0] == video_path]:
+                self.current_bytes -= self._frames.pop(key).nbytes
+
+    def stats(self):
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "frames": len(self._frames),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
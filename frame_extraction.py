@@ -0,0 +1,132 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import cv2
+
+from frame_cache import FrameCache
+from video_processor import VideoProcessor
+from worker_pool import init_worker
+
+
+class ExtractionReport:
+    """Outcome of an extract_frames() run"""
+
+    def __init__(self, written=0, failed=None, seconds=0.0, videos=0):
+        self.written = written
+        self.failed = failed or []  # (video_path, frame_number, output_path)
+        self.seconds = seconds
+        self.videos = videos
+
+    @property
+    def frames_per_second(self):
+        return self.written / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return (f"Extracted {self.written} frames from {self.videos} videos in "
+                f"{self.seconds:.1f}s ({self.frames_per_second:.1f} frames/s)"
+                + (f", {len(self.failed)} failed" if self.failed else ""))
+
+
+def plan_extraction(requests, max_frames_per_task=500):
+    """Group (video_path, frame_number, output_path) requests into tasks
+
+    Each task is a run of one video's frames sorted by frame number, so a
+    worker reads it in a single forward pass with at most one seek per gap.
+    Long videos are split into several tasks so that they spread over the
+    pool like many short ones.
+    """
+    by_video = {}
+    for video_path, frame_number, output_path in requests:
+        by_video.setdefault(video_path, []).append((frame_number, output_path))
+    tasks = []
+    for video_path, frames in by_video.items():
+        frames.sort()
+        for start in range(0, len(frames), max_frames_per_task):
+            tasks.append((video_path, frames[start:start + max_frames_per_task]))
+    # Largest tasks first keeps the pool busy until the end
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+    return tasks
+
+
+def _collect(write, video_path, failed):
+    frame_number, output_path, future = write
+    if not future.result():
+        failed.append((video_path, frame_number, output_path))
+
+
+def _extract_task(task, jpeg_quality=95, encode_threads=2):
+    """Decode one run of frames and write them as JPEGs
+
+    Decoding is sequential, but cv2.imwrite releases the GIL, so encoding
+    overlaps with decoding the next frame on a small thread pool.
+    """
+    video_path, frames = task
+    # Frames are visited in order, so nothing needs to stay cached
+    processor = VideoProcessor(FrameCache(0))
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    failed = []
+    try:
+        processor.load_video(video_path)
+        if processor.cap is None or not processor.cap.isOpened():
+            return 0, [(video_path, n, path) for n, path in frames]
+        with ThreadPoolExecutor(max_workers=encode_threads) as encoder:
+            # Bound the frames waiting for the encoder so memory stays flat
+            writes = deque()
+            for frame_number, output_path in frames:
+                frame = processor.get_frame(frame_number)
+                if frame is None:
+                    failed.append((video_path, frame_number, output_path))
+                    continue
+                writes.append((frame_number, output_path,
+                               encoder.submit(cv2.imwrite, output_path, frame, params)))
+                while len(writes) > encode_threads * 2:
+                    _collect(writes.popleft(), video_path, failed)
+            while writes:
+                _collect(writes.popleft(), video_path, failed)
+    finally:
+        processor.close()
+    return len(frames) - len(failed), failed
+
+
+def extract_frames(requests, workers=None, progress=None, jpeg_quality=95,
+                   max_frames_per_task=500):
+    """Write many video frames to JPEG files using a pool of processes
+
+    requests is an iterable of (video_path, frame_number, output_path).
+    Every worker process opens its own decoders. progress, if given, is
+    called with (frames_done, frames_total) as tasks complete.
+    """
+    tasks = plan_extraction(requests, max_frames_per_task)
+    total = sum(len(frames) for _, frames in tasks)
+    report = ExtractionReport(videos=len({video_path for video_path, _ in tasks}))
+    for directory in {os.path.dirname(output_path) or "."
+                      for _, frames in tasks for _, output_path in frames}:
+        os.makedirs(directory, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    done = 0
+    if workers <= 1 or len(tasks) <= 1:
+        results = (_extract_task(task, jpeg_quality) for task in tasks)
+        for (written, failed), (_, frames) in zip(results, tasks):
+            report.written += written
+            report.failed.extend(failed)
+            done += len(frames)
+            if progress:
+                progress(done, total)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=init_worker) as executor:
+            futures = {executor.submit(_extract_task, task, jpeg_quality): task
+                       for task in tasks}
+            for future in as_completed(futures):
+                written, failed = future.result()
+                report.written += written
+                report.failed.extend(failed)
+                done += len(futures[future][1])
+                if progress:
+                    progress(done, total)
+    report.seconds = time.perf_counter() - start
+    return report
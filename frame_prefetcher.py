@@ -0,0 +1,97 @@
+import cv2
+from PyQt5.QtCore import pyqtSignal
+
+from latest_worker import LatestRequestWorker
+from workspace import DecoderPool
+
+
+class FramePrefetcher(LatestRequestWorker):
+    """Decode frames on a worker thread with its own cv2.VideoCapture
+
+    The GUI calls request() with the frame it wants to show. The worker
+    decodes that frame first and emits frameReady, then fills the shared
+    frame cache with a window of frames in the direction the user is moving.
+    A newer request cancels whatever prefetching is still in progress.
+    
+    Preview requests (sent while the slider is being dragged) decode the
+    nearest preceding keyframe instead, which needs no pre-roll, and skip
+    prefetching. previewReady carries the frame that was actually shown,
+    downscaled here so the GUI thread only has to upload it.
+    
+    The worker keeps its own pool of open decoders, so switching back to a
+    recently used video does not reopen it.
+    """
+    frameReady = pyqtSignal(str, int, object)  # video_path, frame_number, frame
+    previewReady = pyqtSignal(str, int, int, object)  # video_path, requested, shown, frame
+
+    def __init__(self, frame_cache, seek_threshold=30, window=8, use_index=False,
+                 max_open=4, preview_max_size=640, parent=None):
+        super().__init__(parent)
+        self.frame_cache = frame_cache
+        self.window = window
+        self.preview_max_size = preview_max_size
+        self.decoders = DecoderPool(frame_cache, max_open, seek_threshold, use_index)
+        self.video_processor = None
+        self._last_frame = None
+
+    def request(self, video_path, frame_number, preview=False):
+        """Ask for frame_number, superseding any earlier request"""
+        direction = 1
+        if self._last_frame is not None and frame_number < self._last_frame:
+            direction = -1
+        self._last_frame = frame_number
+        self._submit((video_path, frame_number, direction, preview))
+
+    def stop(self):
+        super().stop()
+        self.decoders.close()
+
+    def _handle(self, request, generation):
+        video_path, frame_number, direction, preview = request
+        try:
+            self.video_processor = self.decoders.get(video_path)
+        except OSError:
+            return
+
+        if preview:
+            self._preview(video_path, frame_number)
+            return
+
+        frame = self.video_processor.get_frame(frame_number)
+        if frame is not None:
+            self.frameReady.emit(video_path, frame_number, frame)
+
+        # Decode ahead in the direction of travel. Backward windows are
+        # still read in ascending order so they cost one seek, not one each.
+        if direction > 0:
+            ahead = range(frame_number + 1, frame_number + 1 + self.window)
+        else:
+            ahead = range(max(frame_number - self.window, 0), frame_number)
+        for n in ahead:
+            if self._is_stale(generation):
+                break
+            if n >= self.video_processor.total_frames:
+                break
+            if (video_path, n) not in self.frame_cache:
+                self.video_processor.get_frame(n)
+
+    def _preview(self, video_path, frame_number):
+        shown_frame = frame_number
+        frame = self.frame_cache.get(video_path, frame_number)
+        if frame is None:
+            if self.video_processor.index is not None:
+                shown_frame = self.video_processor.index.keyframe_before(frame_number)
+            frame = self.video_processor.get_frame(shown_frame)
+        if frame is not None:
+            self.previewReady.emit(video_path, frame_number, shown_frame,
+                                   downscale(frame, self.preview_max_size))
+
+
+def downscale(frame, max_size):
+    """Shrink frame so that its longest side is at most max_size"""
+    height, width = frame.shape[:2]
+    scale = min(1.0, max_size / max(height, width))
+    if scale == 1.0:
+        return frame
+    return cv2.resize(frame, (int(width * scale), int(height * scale)),
+                      interpolation=cv2.INTER_AREA)
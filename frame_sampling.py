@@ -0,0 +1,218 @@
+"""Propose diverse, not yet annotated frames of a video for labelling
+
+A video is scanned every ``step`` frames. Each scanned frame is reduced to
+a tiny grayscale image, which gives two features: a normalized pixel vector
+(compared by frame difference) and a 64-bit difference hash (dHash,
+compared by Hamming distance). Frames whose hash is close to a frame that
+is already in the project are dropped. The rest are clustered with k-means
+and the frame nearest each cluster centre is proposed, so the annotation
+budget is spread over visually different content.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from frame_cache import FrameCache
+from video_processor import VideoProcessor
+from worker_pool import run_tasks
+
+FEATURES = ("pixels", "dhash")
+# Frames are first reduced to this many pixels square; hashes and features
+# are computed from that, for video frames and frame JPEGs alike
+REDUCED_SIZE = 32
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class FrameFeatures:
+    """Features of the scanned frames of one video, in frame order"""
+
+    def __init__(self, frame_numbers, vectors, hashes, seconds=0.0):
+        self.frame_numbers = frame_numbers  # (N,) int64
+        self.vectors = vectors  # (N, D) float32
+        self.hashes = hashes  # (N,) uint64 dHash
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.frame_numbers)
+
+    @classmethod
+    def concatenate(cls, parts, seconds=0.0):
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls(np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32),
+                       np.zeros(0, dtype=np.uint64), seconds)
+        return cls(np.concatenate([part.frame_numbers for part in parts]),
+                   np.concatenate([part.vectors for part in parts]),
+                   np.concatenate([part.hashes for part in parts]), seconds)
+
+
+def dhash(grays):
+    """64-bit difference hashes of a (B, H, W) stack of grayscale images"""
+    small = np.stack([cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+                      for gray in grays]).astype(np.int16)
+    bits = (small[:, :, 1:] > small[:, :, :-1]).reshape(len(small), 64)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def feature_vectors(grays, feature="pixels"):
+    """(B, D) float32 clustering features of a (B, H, W) stack of grayscale images"""
+    if feature == "dhash":
+        hashes = dhash(grays)
+        return np.unpackbits(hashes.astype(">u8").view(np.uint8).reshape(-1, 8),
+                             axis=1).astype(np.float32)
+    if feature != "pixels":
+        raise ValueError(f"Unknown feature {feature!r}")
+    vectors = np.asarray(grays, dtype=np.float32).reshape(len(grays), -1)
+    # Zero mean and unit length, so a global brightness change is not "new"
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def hamming_distances(hashes, reference):
+    """(N, M) Hamming distances between two arrays of 64-bit hashes"""
+    xor = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64)[:, None],
+                         np.asarray(reference, dtype=np.uint64)[None, :])
+    return POPCOUNT[xor.view(np.uint8)].reshape(xor.shape + (8,)).sum(axis=2, dtype=np.int32)
+
+
+def near_duplicates(hashes, reference, max_distance, chunk=4096):
+    """Mask of hashes within max_distance bits of any reference hash"""
+    mask = np.zeros(len(hashes), dtype=bool)
+    if not len(reference) or not len(hashes):
+        return mask
+    for start in range(0, len(hashes), chunk):
+        distances = hamming_distances(hashes[start:start + chunk], reference)
+        mask[start:start + chunk] = (distances <= max_distance).any(axis=1)
+    return mask
+
+
+def _reduce(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, (REDUCED_SIZE, REDUCED_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def _scan_task(task):
+    """Features of every step-th frame in [start, stop) of one video"""
+    video_path, start, stop, step, feature, size = task
+    processor = VideoProcessor(FrameCache(0))
+    frame_numbers = []
+    grays = []
+    try:
+        processor.load_video(video_path)
+        if processor.cap is None or not processor.cap.isOpened():
+            return FrameFeatures.concatenate([])
+        for frame_number in range(start, stop, step):
+            frame = processor.get_frame(frame_number)
+            if frame is None:
+                break
+            frame_numbers.append(frame_number)
+            grays.append(_reduce(frame))
+    finally:
+        processor.close()
+    if not grays:
+        return FrameFeatures.concatenate([])
+    small = [cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA) for gray in grays]
+    return FrameFeatures(np.array(frame_numbers, dtype=np.int64),
+                         feature_vectors(small, feature), dhash(grays))
+
+
+def scan_video(video_path, step=5, feature="pixels", size=16, workers=None,
+               segment_frames=3000):
+    """Compute FrameFeatures for every step-th frame of a video
+
+    feature is "pixels" (size x size normalized intensities) or "dhash".
+
+    Long videos are split into segments of segment_frames frames that are
+    scanned in parallel worker processes, each with its own decoder.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise OSError(f"Cannot open video {video_path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    # Segments start on the step grid so the result is the same for any worker count
+    segment_frames = max(step, segment_frames // step * step)
+    tasks = [(video_path, start, min(start + segment_frames, frame_count), step, feature, size)
+             for start in range(0, frame_count, segment_frames)]
+    start_time = time.perf_counter()
+    parts = run_tasks(_scan_task, tasks, workers)
+    return FrameFeatures.concatenate(parts, time.perf_counter() - start_time)
+
+
+def _hash_image(path):
+    frame = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if frame is None:
+        return None
+    return int(dhash([_reduce(frame)])[0])
+
+
+def hash_images(paths, workers=1):
+    """dHashes of image files (e.g. a project's frames/), skipping unreadable ones"""
+    hashes = run_tasks(_hash_image, list(paths), workers, chunksize=64)
+    return np.array([h for h in hashes if h is not None], dtype=np.uint64)
+
+
+def propose_frames(features, count, existing_frames=(), existing_hashes=(),
+                   duplicate_distance=6, min_gap=None, seed=0):
+    """Pick up to count diverse frame numbers from scanned FrameFeatures
+
+    Candidates are dropped when they lie within min_gap frames (default:
+    the scan step) of an existing frame of this video, or when their hash
+    is within duplicate_distance bits of an existing hash. Existing frames
+    are also compared through the hash of the nearest scanned frame. The
+    remaining candidates are clustered into count groups with k-means and
+    the frame closest to each centre is proposed; proposals that are near
+    duplicates of each other are merged. Returns sorted frame numbers.
+    """
+    if not len(features) or count <= 0:
+        return []
+    frame_numbers = features.frame_numbers
+    existing_frames = np.unique(np.asarray(list(existing_frames), dtype=np.int64))
+    if min_gap is None:
+        min_gap = int(np.diff(frame_numbers).min()) if len(frame_numbers) > 1 else 1
+
+    reference = [np.asarray(existing_hashes, dtype=np.uint64)]
+    keep = np.ones(len(frame_numbers), dtype=bool)
+    if len(existing_frames):
+        # Distance from every candidate to the nearest existing frame
+        right = np.searchsorted(existing_frames, frame_numbers)
+        before = existing_frames[np.maximum(right - 1, 0)]
+        after = existing_frames[np.minimum(right, len(existing_frames) - 1)]
+        nearest = np.minimum(np.abs(frame_numbers - before), np.abs(frame_numbers - after))
+        keep &= nearest >= min_gap
+        scanned = np.clip(np.searchsorted(frame_numbers, existing_frames), 0,
+                          len(frame_numbers) - 1)
+        reference.append(features.hashes[scanned])
+    reference = np.concatenate(reference)
+    keep &= ~near_duplicates(features.hashes, reference, duplicate_distance)
+
+    candidates = np.flatnonzero(keep)
+    if len(candidates) <= count:
+        chosen = candidates
+    else:
+        vectors = np.ascontiguousarray(features.vectors[candidates], dtype=np.float32)
+        cv2.setRNGSeed(seed)
+        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_MAX_ITER, 50, 1e-4)
+        _, labels, centres = cv2.kmeans(vectors, count, None, criteria, 3,
+                                        cv2.KMEANS_PP_CENTERS)
+        labels = labels.ravel()
+        distances = np.linalg.norm(vectors - centres[labels], axis=1)
+        chosen = []
+        for cluster in range(count):
+            members = np.flatnonzero(labels == cluster)
+            if len(members):
+                chosen.append(candidates[members[np.argmin(distances[members])]])
+        chosen = np.array(chosen, dtype=np.intp)
+
+    # Two clusters can still settle on near-identical frames
+    selected = []
+    for index in chosen[np.argsort(frame_numbers[chosen])]:
+        if selected and near_duplicates(features.hashes[[index]],
+                                        features.hashes[selected], duplicate_distance)[0]:
+            continue
+        selected.append(index)
+    return frame_numbers[selected].tolist()
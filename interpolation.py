@@ -0,0 +1,147 @@
+import numpy as np
+
+INTERPOLATION_METHODS = ("linear", "spline")
+
+
+def interpolate_poses(frame_numbers, poses, targets, method="linear", max_gap=None):
+    """Estimate poses at target frames from labelled keyframes
+
+    frame_numbers holds the M keyframes in ascending order and poses their
+    (M, K, 3) keypoints as COCO (x, y, v). Each joint is interpolated on its
+    own, using only the keyframes where it is labelled (v > 0), so a joint
+    that is unlabelled in a keyframe does not pull the others towards (0, 0).
+    Targets outside a joint's labelled range, or inside a gap longer than
+    max_gap frames, get v = 0. The estimated v is the lower of the two
+    neighbouring keyframes' flags. method is "linear" or "spline" (a cubic
+    Hermite spline through the keyframes). Returns a (T, K, 3) float32 array.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method {method!r}")
+    frame_numbers = np.asarray(frame_numbers, dtype=np.float64)
+    poses = np.asarray(poses, dtype=np.float32)
+    targets = np.atleast_1d(np.asarray(targets, dtype=np.float64))
+    result = np.zeros((len(targets), poses.shape[1], 3), dtype=np.float32)
+
+    for joint in range(poses.shape[1]):
+        labeled = poses[:, joint, 2] > 0
+        times = frame_numbers[labeled]
+        if len(times) < 2:
+            continue
+        points = poses[labeled, joint, :2].astype(np.float64)
+        visibility = poses[labeled, joint, 2]
+
+        # Bracketing keyframes of every target
+        right = np.clip(np.searchsorted(times, targets, side='right'), 1, len(times) - 1)
+        left = right - 1
+        gap = times[right] - times[left]
+        inside = (targets >= times[0]) & (targets <= times[-1])
+        if max_gap is not None:
+            inside &= gap <= max_gap
+        if not inside.any():
+            continue
+        right, left, gap, t = right[inside], left[inside], gap[inside], targets[inside]
+        alpha = ((t - times[left]) / gap)[:, None]
+
+        if method == "linear":
+            xy = points[left] + alpha * (points[right] - points[left])
+        else:
+            # Tangents from central differences, one-sided at the ends
+            tangents = np.empty_like(points)
+            tangents[1:-1] = (points[2:] - points[:-2]) / (times[2:] - times[:-2])[:, None]
+            tangents[0] = (points[1] - points[0]) / (times[1] - times[0])
+            tangents[-1] = (points[-1] - points[-2]) / (times[-1] - times[-2])
+            a2 = alpha * alpha
+            a3 = a2 * alpha
+            h = gap[:, None]
+            xy = ((2 * a3 - 3 * a2 + 1) * points[left] +
+                  (a3 - 2 * a2 + alpha) * h * tangents[left] +
+                  (-2 * a3 + 3 * a2) * points[right] +
+                  (a3 - a2) * h * tangents[right])
+
+        alpha = alpha[:, 0]
+        v = np.minimum(visibility[left], visibility[right])
+        # Keyframes themselves keep their own flag
+        v = np.where(alpha == 0, visibility[left], np.where(alpha == 1, visibility[right], v))
+        result[inside, joint, :2] = xy
+        result[inside, joint, 2] = v
+    return result
+
+
+class KeyframeInterpolator:
+    """Provisional poses for the unlabelled frames of a video
+
+    The labelled frames of each video are gathered from the AnnotationStore
+    into arrays the first time the video is interpolated. The GUI passes
+    every save to update(), which patches those arrays in place of a rebuild.
+    """
+
+    def __init__(self, store, keypoint_count, method="linear", max_gap=None):
+        self.store = store
+        self.keypoint_count = keypoint_count
+        self.method = method
+        self.max_gap = max_gap
+        self._keyframes = {}  # video_file -> (frame_numbers, poses)
+
+    def set_store(self, store):
+        self.store = store
+        self._keyframes.clear()
+
+    def invalidate(self, video_file=None):
+        if video_file is None:
+            self._keyframes.clear()
+        else:
+            self._keyframes.pop(video_file, None)
+
+    def update(self, video_file, frame_number, keypoints):
+        """Put a saved frame's keypoints into the video's cached keyframes"""
+        cached = self._keyframes.get(video_file)
+        if cached is None:
+            return  # Gathered from the store when first needed
+        frame_numbers, poses = cached
+        row = int(np.searchsorted(frame_numbers, frame_number))
+        exists = row < len(frame_numbers) and frame_numbers[row] == frame_number
+        if not keypoints or len(keypoints) != self.keypoint_count * 3:
+            if exists:
+                cached = (np.delete(frame_numbers, row), np.delete(poses, row, axis=0))
+        else:
+            pose = np.asarray(keypoints, dtype=np.float32).reshape(self.keypoint_count, 3)
+            if exists:
+                poses = poses.copy()
+                poses[row] = pose
+                cached = (frame_numbers, poses)
+            else:
+                cached = (np.insert(frame_numbers, row, frame_number),
+                          np.insert(poses, row, pose, axis=0))
+        self._keyframes[video_file] = cached
+
+    def keyframes(self, video_file):
+        """Return the sorted frame numbers and (M, K, 3) poses of a video"""
+        cached = self._keyframes.get(video_file)
+        if cached is not None:
+            return cached
+        images = sorted((image["frame_number"], image["id"])
+                        for image in self.store.video_images(video_file))
+        poses = self.store.get_poses([image_id for _, image_id in images], self.keypoint_count)
+        frame_numbers = []
+        labeled = []
+        for (frame_number, _), pose in zip(images, poses):
+            if pose is not None:
+                frame_numbers.append(frame_number)
+                labeled.append(pose)
+        cached = (np.asarray(frame_numbers, dtype=np.float64),
+                  np.array(labeled, dtype=np.float32).reshape(-1, self.keypoint_count, 3))
+        self._keyframes[video_file] = cached
+        return cached
+
+    def interpolate(self, video_file, frame_numbers):
+        """Return (T, K, 3) estimated poses for frame_numbers of video_file"""
+        keyframe_numbers, poses = self.keyframes(video_file)
+        return interpolate_poses(keyframe_numbers, poses, frame_numbers,
+                                 self.method, self.max_gap)
+
+    def provisional_pose(self, video_file, frame_number):
+        """Return the (K, 3) estimate for one frame, or None if there is none"""
+        pose = self.interpolate(video_file, [frame_number])[0]
+        if not (pose[:, 2] > 0).any():
+            return None
+        return pose
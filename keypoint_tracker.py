@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import pyqtSignal
+
+from latest_worker import LatestRequestWorker
+
+
+class KeypointTracker(LatestRequestWorker):
+    """Carry keypoints from one frame to a nearby one with pyramidal Lucas-Kanade
+
+    The GUI calls request() with the frames it already has decoded; tracking
+    runs on this thread and reports through poseTracked. A newer request
+    replaces one that has not started yet. The grayscale images are cached
+    per frame, so stepping through a video converts each frame once and
+    reuses it as the source of the next step. (OpenCV's Python bindings
+    cannot pass prebuilt buildOpticalFlowPyramid levels to
+    calcOpticalFlowPyrLK, so the pyramids themselves are rebuilt by it.)
+
+    Points are tracked forward and then back again; points that do not
+    return to within max_error pixels of where they started are dropped.
+    """
+    poseTracked = pyqtSignal(str, int, object)  # video_path, frame_number, {name: (x, y, v)}
+
+    def __init__(self, window=21, levels=3, max_error=2.0, cached_frames=4, parent=None):
+        super().__init__(parent)
+        self.window = (window, window)
+        self.levels = levels
+        self.max_error = max_error
+        self.cached_frames = cached_frames
+        self.criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01)
+        self._gray = OrderedDict()  # (video_path, frame_number) -> grayscale frame
+
+    def request(self, video_path, source_number, source_frame, keypoints,
+                target_number, target_frame):
+        """Track keypoints ({name: (x, y, v)}) from source_frame to target_frame"""
+        self._submit((video_path, source_number, source_frame, dict(keypoints),
+                      target_number, target_frame))
+
+    def _handle(self, request, generation):
+        (video_path, source_number, source_frame, keypoints,
+         target_number, target_frame) = request
+        source = self._grayscale(video_path, source_number, source_frame)
+        target = self._grayscale(video_path, target_number, target_frame)
+        tracked = self.track(source, target, keypoints)
+        if tracked:
+            self.poseTracked.emit(video_path, target_number, tracked)
+
+    def _grayscale(self, video_path, frame_number, frame):
+        key = (video_path, frame_number)
+        gray = self._gray.get(key)
+        if gray is not None:
+            self._gray.move_to_end(key)
+            return gray
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self._gray[key] = gray
+        while len(self._gray) > self.cached_frames:
+            self._gray.popitem(last=False)
+        return gray
+
+    def track(self, source, target, keypoints):
+        """Track keypoints between two grayscale frames; returns the ones that held"""
+        names = [name for name, (x, y, v) in keypoints.items() if v > 0]
+        if not names:
+            return {}
+        points = np.array([keypoints[name][:2] for name in names],
+                          dtype=np.float32).reshape(-1, 1, 2)
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(
+            source, target, points, None, winSize=self.window, maxLevel=self.levels,
+            criteria=self.criteria)
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            target, source, forward, None, winSize=self.window, maxLevel=self.levels,
+            criteria=self.criteria)
+        error = np.linalg.norm((backward - points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error <= self.max_error)
+        forward = forward.reshape(-1, 2)
+        return {name: (float(forward[i, 0]), float(forward[i, 1]), keypoints[name][2])
+                for i, name in enumerate(names) if good[i]}
@@ -0,0 +1,52 @@
+import threading
+
+from PyQt5.QtCore import QThread
+
+
+class LatestRequestWorker(QThread):
+    """Worker thread that only ever serves the newest request
+
+    Subclasses queue work from the GUI thread with _submit() and do it in
+    _handle(). A request submitted while another is still waiting replaces
+    it, so a burst of requests (e.g. slider scrubbing) costs one job. A
+    long-running _handle() polls _is_stale() with the generation it was given
+    and gives up once a newer request or stop() has arrived.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._generation = 0
+        self._stopped = False
+
+    def _submit(self, request):
+        """Queue request, replacing one that has not started yet"""
+        with self._condition:
+            self._generation += 1
+            self._pending = request
+            self._condition.notify()
+
+    def stop(self):
+        """Finish the job in progress, drop the pending one and end the thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self.wait()
+
+    def _is_stale(self, generation):
+        return self._stopped or generation != self._generation
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                request, self._pending = self._pending, None
+                generation = self._generation
+            self._handle(request, generation)
+
+    def _handle(self, request, generation):
+        raise NotImplementedError
@@ -0,0 +1,61 @@
+"""Container format of the memory-mapped binary files (pose sidecar, thumbnails)
+
+A file starts with a magic string, the length of a JSON header as a
+little-endian uint32 and the header itself. Data sections follow at
+ALIGNMENT-byte aligned offsets listed in the header's "offsets", so each
+one can be mapped with np.memmap.
+"""
+import json
+import os
+import struct
+
+ALIGNMENT = 64
+
+
+def aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def source_signature(path):
+    """Header fields identifying the version of the file a container mirrors"""
+    stat = os.stat(path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def matches_source(header, path):
+    """Whether path is still the file the container was written from"""
+    return all(header.get(key) == value for key, value in source_signature(path).items())
+
+
+def place_sections(magic, header, sizes):
+    """Set header["offsets"] for (name, byte size) sections; return the file size"""
+    # Offsets depend on the header length, which depends on the offsets;
+    # reserving room for their digits first makes one pass enough
+    header["offsets"] = {name: 0 for name, _ in sizes}
+    offset = aligned(len(magic) + 4 + len(json.dumps(header).encode()) + 20 * len(sizes))
+    end = offset
+    for name, size in sizes:
+        header["offsets"][name] = offset
+        end = offset + size
+        offset = aligned(end)
+    return end
+
+
+def write_header(f, magic, header):
+    header_bytes = json.dumps(header).encode()
+    f.write(magic + struct.pack("<I", len(header_bytes)) + header_bytes)
+
+
+def read_header(path, magic, version):
+    """Header of the file at path, or None if it is missing, foreign or another version"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(magic)) != magic:
+                return None
+            header_length, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length))
+    except (OSError, ValueError, struct.error):
+        return None
+    if not isinstance(header, dict) or header.get("version") != version:
+        return None
+    return header
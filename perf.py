@@ -0,0 +1,187 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Histogram bin edges in milliseconds, log spaced from 10 us to 10 s
+BIN_EDGES_MS = np.logspace(-2, 4, 25)
+
+
+class RollingHistogram:
+    """Durations of the last ``window`` calls of one span"""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0  # All calls, including those that left the window
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def milliseconds(self):
+        return np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000
+
+    def bins(self):
+        """Counts per BIN_EDGES_MS bin over the window"""
+        counts, _ = np.histogram(self.milliseconds(), BIN_EDGES_MS)
+        return counts
+
+    def summary(self):
+        ms = self.milliseconds()
+        if not len(ms):
+            return {"count": self.count}
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        return {
+            "count": self.count,
+            "p50_ms": round(p50, 3),
+            "p95_ms": round(p95, 3),
+            "p99_ms": round(p99, 3),
+            "max_ms": round(ms.max(), 3),
+            "last_ms": round(ms[-1], 3)
+        }
+
+
+class Profiler:
+    """Timing spans around the hot paths, kept as rolling histograms
+
+    Disabled by default; a disabled span costs one attribute check. While
+    enabled, every span is also kept as a trace event (up to max_events) so
+    a session can be exported and opened in chrome://tracing or Perfetto.
+    Spans may be recorded from any thread.
+    """
+
+    def __init__(self, window=1000, max_events=100000):
+        self.enabled = False
+        self.window = window
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)  # (name, start, duration, thread id)
+        self.thread_names = {}
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.events.clear()
+            self.thread_names = {}
+            self._epoch = time.perf_counter()
+
+    def record(self, name, start, end):
+        thread_id = threading.get_ident()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.window)
+            histogram.add(end - start)
+            self.events.append((name, start, end - start, thread_id))
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+
+    def span(self, name):
+        """Context manager timing the block under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def sample_count(self):
+        with self._lock:
+            return sum(histogram.count for histogram in self.histograms.values())
+
+    def summary(self):
+        """Percentiles over the rolling window of every span, by name"""
+        with self._lock:
+            return {name: histogram.summary()
+                    for name, histogram in sorted(self.histograms.items())}
+
+    def format_summary(self, separator="\n"):
+        """One line per span with its p50/p95/p99 in milliseconds"""
+        lines = []
+        for name, stats in self.summary().items():
+            if "p50_ms" not in stats:
+                continue
+            lines.append(f"{name.rsplit('.', 1)[-1]}: {stats['p50_ms']:.1f} / "
+                         f"{stats['p95_ms']:.1f} / {stats['p99_ms']:.1f} ms "
+                         f"(n={stats['count']})")
+        return separator.join(lines)
+
+    def chrome_trace(self):
+        """The recorded spans in Chrome's trace event format"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+            histograms = {name: histogram.summary()
+                          for name, histogram in self.histograms.items()}
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                  "args": {"name": thread_name}}
+                 for thread_id, thread_name in thread_names.items()]
+        for name, start, duration, thread_id in events:
+            trace.append({
+                "name": name,
+                "cat": "pose",
+                "ph": "X",
+                "ts": round((start - self._epoch) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": thread_id
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms",
+                "otherData": {"histograms": histograms}}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+# The process-wide profiler the application's spans report to
+profiler = Profiler()
+
+
+def timed(name=None):
+    """Decorator recording each call as a span (named after the function by default)"""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(span_name, start, time.perf_counter())
+        return wrapper
+    return decorate
@@ -0,0 +1,132 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+
+class PoseLayout:
+    """Keypoint names, their row indices and the skeleton, built once per PoseConfig
+
+    ``bones`` holds the skeleton as a (B, 2) array of 0-based row indices in
+    the order of pose_config.skeleton; connections naming an unknown keypoint
+    are kept (so bone numbers still line up) but masked out by ``valid_bones``.
+    ``bones_at`` lists the valid bones touching each keypoint row.
+    """
+
+    def __init__(self, keypoint_names, skeleton=()):
+        self.names = list(keypoint_names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        count = len(self.names)
+        # Skeleton indices are 1-based
+        bones = [(start - 1, end - 1) for start, end in skeleton]
+        self.bones = np.array(bones, dtype=np.intp).reshape(-1, 2)
+        self.valid_bones = ((self.bones >= 0) & (self.bones < count)).all(axis=1)
+        self.bones[~self.valid_bones] = 0
+        self.bones_at = [[] for _ in range(count)]
+        for bone in np.flatnonzero(self.valid_bones).tolist():
+            for row in set(self.bones[bone].tolist()):
+                self.bones_at[row].append(bone)
+
+    @classmethod
+    def from_config(cls, pose_config):
+        return cls(pose_config.keypoint_names, pose_config.skeleton)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Pose(MutableMapping):
+    """One frame's keypoints as a (K, 3) float32 array of COCO (x, y, v)
+
+    Rows follow the layout's keypoint order and unlabelled keypoints are all
+    zero. For the GUI it also behaves like the old name -> (x, y, v) dict:
+    only labelled keypoints (v > 0) are keys, and assigning or deleting a
+    name writes or clears its row.
+    """
+
+    def __init__(self, layout, data=None):
+        self.layout = layout
+        if data is None:
+            data = np.zeros((len(layout), 3), dtype=np.float32)
+        self.data = data
+
+    @classmethod
+    def from_coco(cls, layout, keypoints):
+        """Build a pose from a flat COCO keypoint list (or any (K, 3) array)"""
+        data = np.array(keypoints, dtype=np.float32).reshape(len(layout), 3)
+        data[data[:, 2] <= 0] = 0
+        return cls(layout, data)
+
+    @classmethod
+    def from_mapping(cls, layout, keypoints):
+        if isinstance(keypoints, Pose):
+            return keypoints.copy()
+        pose = cls(layout)
+        for kp_name, value in keypoints.items():
+            pose[kp_name] = value
+        return pose
+
+    def copy(self):
+        return Pose(self.layout, self.data.copy())
+
+    @property
+    def labeled(self):
+        """Boolean mask of labelled keypoints"""
+        return self.data[:, 2] > 0
+
+    def __getitem__(self, kp_name):
+        x, y, v = self.data[self.layout.index[kp_name]].tolist()
+        if v <= 0:
+            raise KeyError(kp_name)
+        return x, y, int(v)
+
+    def __setitem__(self, kp_name, value):
+        self.data[self.layout.index[kp_name]] = value
+
+    def __delitem__(self, kp_name):
+        row = self.layout.index[kp_name]
+        if self.data[row, 2] <= 0:
+            raise KeyError(kp_name)
+        self.data[row] = 0
+
+    def __iter__(self):
+        names = self.layout.names
+        return iter([names[i] for i in np.flatnonzero(self.labeled)])
+
+    def __len__(self):
+        return int(np.count_nonzero(self.labeled))
+
+    def __repr__(self):
+        return f"Pose({dict(self)!r})"
+
+    def bounds(self):
+        """Unpadded [x_min, y_min, x_max, y_max] of the labelled keypoints, or None"""
+        points = self.data[self.labeled, :2]
+        if not len(points):
+            return None
+        return points.min(axis=0).tolist() + points.max(axis=0).tolist()
+
+    def visibility_counts(self):
+        """Return (visible, estimated) keypoint counts"""
+        v = self.data[:, 2]
+        return int(np.count_nonzero(v == 2)), int(np.count_nonzero(v == 1))
+
+    def bone_mask(self):
+        """Which skeleton connections have both ends labelled"""
+        labeled = self.labeled
+        return self.layout.valid_bones & labeled[self.layout.bones].all(axis=1)
+
+    def to_coco(self):
+        """Flat COCO keypoint list; unlabelled keypoints are written as 0, 0, 0"""
+        rows = np.where(self.labeled)[0]
+        # Object cells keep visibilities and the zeros of unlabelled rows ints
+        keypoints = np.zeros(self.data.shape, dtype=object)
+        # float32 carries about 7 significant digits, so round away the noise
+        keypoints[rows, :2] = np.round(self.data[rows, :2].astype(np.float64), 3)
+        keypoints[rows, 2] = self.data[rows, 2].astype(int)
+        return keypoints.ravel().tolist()
+
+
+def stack_poses(annotations, keypoint_count):
+    """Return the keypoints of many annotations as one (N, K, 3) float32 array"""
+    return np.array([annotation["keypoints"] for annotation in annotations],
+                    dtype=np.float32).reshape(-1, keypoint_count, 3)
@@ -1,5 +1,3 @@
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor
-
 class PoseConfig:
     def __init__(self):
         # Keypoint definitions
@@ -17,29 +15,103 @@ class PoseConfig:
             [2,4], [3,5], [4,6], [5,7]
         ]
         
-        # Color definitions for keypoints
-        self.keypoint_colors = {
-            "nose": QColor(255, 0, 0),      # Red
-            "left_eye": QColor(255, 85, 0),  
-            "right_eye": QColor(255, 170, 0),
-            "left_ear": QColor(255, 255, 0),  
-            "right_ear": QColor(170, 255, 0),
-            "left_shoulder": QColor(85, 255, 0),
-            "right_shoulder": QColor(0, 255, 0),
-            "left_elbow": QColor(0, 255, 85),   
-            "right_elbow": QColor(0, 255, 170),
-            "left_wrist": QColor(0, 255, 255),  
-            "right_wrist": QColor(0, 170, 255),
-            "left_hip": QColor(0, 85, 255),    
-            "right_hip": QColor(0, 0, 255),    
-            "left_knee": QColor(85, 0, 255),   
-            "right_knee": QColor(170, 0, 255),
-            "left_ankle": QColor(255, 0, 255),
-            "right_ankle": QColor(255, 0, 170)
+        # Color definitions for keypoints as (r, g, b); Qt colors are built
+        # on first use so batch tools can load the config without PyQt5
+        self.keypoint_rgb = {
+            "nose": (255, 0, 0),      # Red
+            "left_eye": (255, 85, 0),  
+            "right_eye": (255, 170, 0),
+            "left_ear": (255, 255, 0),  
+            "right_ear": (170, 255, 0),
+            "left_shoulder": (85, 255, 0),
+            "right_shoulder": (0, 255, 0),
+            "left_elbow": (0, 255, 85),   
+            "right_elbow": (0, 255, 170),
+            "left_wrist": (0, 255, 255),  
+            "right_wrist": (0, 170, 255),
+            "left_hip": (0, 85, 255),    
+            "right_hip": (0, 0, 255),    
+            "left_knee": (85, 0, 255),   
+            "right_knee": (170, 0, 255),
+            "left_ankle": (255, 0, 255),
+            "right_ankle": (255, 0, 170)
         }
         
-        self.skeleton_color = QColor(0, 128, 255)  # Light blue
+        self.skeleton_rgb = (0, 128, 255)  # Light blue
+        self._qt_colors = None
+        
+        # Memory budget for decoded video frames kept for fast revisiting
+        self.frame_cache_mb = 512
+        # Forward jumps up to this many frames decode sequentially instead of seeking
+        self.seek_threshold_frames = 30
+        # Frames decoded ahead of the slider in the direction of travel
+        self.prefetch_window = 8
+        # Index keyframes once per video (cached in <video>.index.json) for accurate seeking
+        self.use_keyframe_index = True
+        # Videos kept open at once (per decoding thread) for fast switching
+        self.max_open_videos = 4
+        # Slider/spinbox changes are coalesced into one update per interval
+        self.frame_update_interval_ms = 16
+        # Longest side of the downscaled preview shown while dragging the slider
+        self.preview_max_size = 640
+        # Frames whose longest side exceeds this are drawn from a tiled pyramid
+        self.tiled_render_min_size = 4096
+        self.render_tile_size = 512
+        # Filmstrip of thumbnails under the frame, built in the background into
+        # <output_dir>/thumbnails/<video>.thumbs; long videos get one
+        # thumbnail every few frames so at most thumbnail_max_count are kept
+        self.thumbnails = True
+        self.thumbnail_width = 96
+        self.thumbnail_max_count = 3000
+        
+        # Append saves to annotations.json.journal and fold them into the
+        # snapshot in the background every journal_compact_every saves
+        self.journaled_save = True
+        self.journal_compact_every = 200
+        # Mirror keypoints into annotations.json.poses, a memory-mappable
+        # binary file, whenever the full snapshot is rewritten
+        self.pose_sidecar = True
+        
+        # Unlabelled frames between labelled ones of the same video show
+        # interpolated keypoints ("linear" or "spline") for the user to correct
+        self.interpolate_keypoints = True
+        self.interpolation_method = "linear"
+        self.interpolation_max_gap = 120  # frames
+        
+        # Stepping up to tracking_max_step frames forward from a labelled frame
+        # tracks its keypoints into the new frame (pyramidal Lucas-Kanade)
+        self.track_keypoints = True
+        self.tracking_max_step = 5
+        self.tracking_window = 21
+        self.tracking_levels = 3
         
+        # Time decode, display, redraw and save calls into rolling histograms
+        # (toggle with Ctrl+Shift+P, export a Chrome trace with Ctrl+Shift+E);
+        # shown as an "overlay" on the frame or in the status "messages"
+        self.perf_enabled = False
+        self.perf_display = "overlay"
+        self.perf_window = 1000  # Calls per histogram
+        self.perf_report_interval_ms = 1000
+        
+    def _build_qt_colors(self):
+        from PyQt5.QtGui import QColor
+        self._qt_colors = (
+            {name: QColor(*rgb) for name, rgb in self.keypoint_rgb.items()},
+            QColor(*self.skeleton_rgb))
+
+    @property
+    def keypoint_colors(self):
+        """QColor per keypoint name"""
+        if self._qt_colors is None:
+            self._build_qt_colors()
+        return self._qt_colors[0]
+
+    @property
+    def skeleton_color(self):
+        if self._qt_colors is None:
+            self._build_qt_colors()
+        return self._qt_colors[1]
+
     def get_category_config(self):
         """Return the category configuration for COCO format"""
         return {
@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+
+from mapped_file import (matches_source, place_sections, read_header, source_signature,
+                         write_header)
+from pose import stack_poses
+
+SIDECAR_VERSION = 2
+MAGIC = b"POSESIDE"
+
+# Column name -> dtype, in file order; keypoints is (N, K, 3)
+COLUMNS = (
+    ("image_id", np.dtype("<i8")),
+    ("video", np.dtype("<i4")),  # Index into the header's video list, -1 if none
+    ("frame_number", np.dtype("<i8")),
+    ("length", np.dtype("<i4")),  # Values in the JSON keypoint list, -1 if no annotation
+    ("keypoints", np.dtype("<f4")),
+)
+
+
+def sidecar_path(annotation_file):
+    """Return the path of the binary pose file stored next to annotations.json"""
+    return annotation_file + ".poses"
+
+
+def build_sidecar(store):
+    """Collect a store's keypoints and index columns into arrays
+
+    Reads every lazy keypoint list (materialize), so at scale this belongs
+    on a worker thread together with the JSON encoding. The result is what
+    write_sidecar puts on disk. Rows are sorted by image id; keypoint lists
+    of the wrong length are stored as zeros.
+    """
+    store.materialize()
+    keypoint_names = store.data["categories"][0]["keypoints"]
+    count = len(keypoint_names)
+    images = sorted(store.images, key=lambda image: image["id"])
+    videos = sorted({image.get("video_file") for image in images} - {None})
+    video_index = {video: i for i, video in enumerate(videos)}
+
+    keypoints = np.zeros((len(images), count, 3), dtype=np.float32)
+    lengths = np.full(len(images), -1, dtype=np.int32)
+    rows = []
+    annotations = []
+    for row, image in enumerate(images):
+        annotation = store.annotations_by_image.get(image["id"])
+        if annotation is None:
+            continue
+        lengths[row] = len(annotation.get("keypoints", ()))
+        if lengths[row] == count * 3:
+            rows.append(row)
+            annotations.append(annotation)
+    if rows:
+        keypoints[rows] = stack_poses(annotations, count)
+    columns = {
+        "image_id": np.array([image["id"] for image in images], dtype=np.int64),
+        "video": np.array([video_index.get(image.get("video_file"), -1) for image in images],
+                          dtype=np.int32),
+        "frame_number": np.array([image.get("frame_number", -1) for image in images],
+                                 dtype=np.int64),
+        "length": lengths,
+        "keypoints": keypoints,
+    }
+    return {"keypoint_names": keypoint_names, "videos": videos, "columns": columns}
+
+
+def write_sidecar(annotation_file, sidecar):
+    """Atomically write a build_sidecar() result next to annotation_file
+
+    The header records the size and mtime of annotation_file, so call this
+    after the JSON snapshot it mirrors has been written.
+    """
+    columns = sidecar["columns"]
+    header = {
+        "version": SIDECAR_VERSION,
+        "count": len(columns["image_id"]),
+        "keypoint_names": sidecar["keypoint_names"],
+        "videos": sidecar["videos"],
+        **source_signature(annotation_file),
+    }
+    place_sections(MAGIC, header, [(name, columns[name].size * dtype.itemsize)
+                                   for name, dtype in COLUMNS])
+
+    path = sidecar_path(annotation_file)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        write_header(f, MAGIC, header)
+        for name, dtype in COLUMNS:
+            f.seek(header["offsets"][name])
+            f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PoseSidecar:
+    """Memory-mapped view of the binary pose file
+
+    ``keypoints`` is an (N, K, 3) float32 array and ``image_ids``, ``videos``,
+    ``frame_numbers`` and ``lengths`` are the matching index columns, all
+    mapped straight from the file. Opening reads only the small header.
+    Saves that are still in the annotation journal are overlaid by pose()
+    and find().
+    """
+
+    def __init__(self, keypoint_names, video_files, columns, path=None, journal=None):
+        self.path = path
+        self.keypoint_names = keypoint_names
+        self.video_files = video_files
+        self.image_ids = columns["image_id"]
+        self.videos = columns["video"]
+        self.frame_numbers = columns["frame_number"]
+        self.lengths = columns["length"]
+        self.keypoints = columns["keypoints"]
+        # image_id -> (video_file, frame_number, keypoints) saved after the snapshot
+        self.journal = journal or {}
+        self._rows_by_frame = None  # (video_file, frame_number) -> row, built by find()
+
+    @classmethod
+    def build(cls, store):
+        """In-memory sidecar of a store, for when the file is missing or stale"""
+        sidecar = build_sidecar(store)
+        return cls(sidecar["keypoint_names"], sidecar["videos"], sidecar["columns"])
+
+    @classmethod
+    def open(cls, annotation_file, in_memory=False):
+        """Open the sidecar, or return None if it is missing or out of date
+
+        in_memory reads the columns instead of mapping them, so the file can
+        be replaced while the sidecar is in use, as saves do.
+        """
+        path = sidecar_path(annotation_file)
+        header = read_header(path, MAGIC, SIDECAR_VERSION)
+        try:
+            if header is None or not matches_source(header, annotation_file):
+                return None
+            count = header["count"]
+            shapes = {"keypoints": (count, len(header["keypoint_names"]), 3)}
+            columns = {}
+            for name, dtype in COLUMNS:
+                shape = shapes.get(name, (count,))
+                if count == 0:
+                    columns[name] = np.zeros(shape, dtype=dtype)
+                elif in_memory:
+                    columns[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                                offset=header["offsets"][name]).reshape(shape)
+                else:
+                    columns[name] = np.memmap(path, dtype=dtype, mode='r',
+                                              offset=header["offsets"][name], shape=shape)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Imported here because annotation_store writes sidecars itself
+        from annotation_store import AnnotationJournal
+        journal = {}
+        for image, annotation in AnnotationJournal(annotation_file).records():
+            if "keypoints" in annotation:
+                journal[image["id"]] = (image.get("video_file"), image.get("frame_number"),
+                                        annotation["keypoints"])
+        return cls(header["keypoint_names"], header["videos"], columns, path, journal)
+
+    def __len__(self):
+        return len(self.image_ids)
+
+    def row_of(self, image_id):
+        """Row of image_id in the mapped arrays, or None"""
+        row = int(np.searchsorted(self.image_ids, image_id))
+        if row < len(self.image_ids) and self.image_ids[row] == image_id:
+            return row
+        return None
+
+    def pose(self, image_id):
+        """(K, 3) keypoints of an image, or None if it is not in the project"""
+        if image_id in self.journal:
+            return np.array(self.journal[image_id][2], dtype=np.float32).reshape(-1, 3)
+        row = self.row_of(image_id)
+        return None if row is None else self.keypoints[row]
+
+    def find(self, video_file, frame_number):
+        """Image id saved from frame_number of video_file, or None"""
+        for image_id, (journal_video, journal_frame, _) in self.journal.items():
+            if (journal_video, journal_frame) == (video_file, frame_number):
+                return image_id
+        if self._rows_by_frame is None:
+            rows_by_frame = {}
+            for row, (video, frame) in enumerate(zip(self.videos.tolist(),
+                                                     self.frame_numbers.tolist())):
+                if video >= 0:
+                    rows_by_frame.setdefault((self.video_files[video], frame), row)
+            self._rows_by_frame = rows_by_frame
+        row = self._rows_by_frame.get((video_file, frame_number))
+        return None if row is None else int(self.image_ids[row])
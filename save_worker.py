@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class SaveWorker(QObject):
+    """Run frame JPEG writes and annotation writes off the GUI thread
+
+    Jobs run one at a time in submission order, so a frame's JPEG is always
+    on disk before the annotation record that references it. Each job
+    reports back through writeFinished once it is durable, or writeFailed.
+    """
+    writeFinished = pyqtSignal(str)
+    writeFailed = pyqtSignal(str)
+    # Carries a failed job's undo callable back to the worker's own thread
+    _undoRequested = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._undoRequested.connect(self._undo)
+
+    def submit(self, description, steps, undo=None):
+        """Queue a list of callables that together make one save durable
+
+        If a step fails, undo (if given) is called on the thread that owns
+        the SaveWorker, before writeFailed is delivered, so that in-memory
+        changes which never reached the disk can be taken back.
+        """
+        return self._executor.submit(self._run, description, steps, undo)
+
+    def _run(self, description, steps, undo):
+        try:
+            for step in steps:
+                step()
+        except Exception as e:
+            if undo is not None:
+                self._undoRequested.emit(undo)
+            self.writeFailed.emit(f"{description}: {e}")
+        else:
+            self.writeFinished.emit(description)
+
+    def _undo(self, undo):
+        undo()
+
+    def flush(self):
+        """Block until every queued write has finished"""
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import annotation_loader
+from annotation_loader import load_annotation, stream_load
+
+
+def make_dataset(count=40, keypoint_count=5):
+    images = [{"id": i, "file_name": f"{i:012d}.jpg", "video_file": "a.mp4",
+               "frame_number": i * 3} for i in range(1, count + 1)]
+    annotations = [{"id": 100 + i, "image_id": i, "category_id": 1,
+                    "keypoints": [round(i * 1.25 + k, 3) if k % 3 != 2 else (i + k) % 3
+                                  for k in range(keypoint_count * 3)],
+                    "num_keypoints": keypoint_count, "bbox": [i, 2.5, 10, 1e-3]}
+                   for i in range(1, count + 1)]
+    return {"info": {"description": "test"}, "images": images,
+            "annotations": annotations, "categories": [{"id": 1, "name": "person"}]}
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Tiny reads make values straddle buffer refills
+    monkeypatch.setattr(annotation_loader._Scanner.__init__, "__defaults__", (7,))
+
+
+def write(tmp_path, data, **kwargs):
+    path = tmp_path / "annotations.json"
+    path.write_text(json.dumps(data, **kwargs))
+    return str(path)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_eager_load_matches_json_load(tmp_path, small_chunks, indent):
+    path = write(tmp_path, make_dataset(), indent=indent)
+    data, spans, _ = stream_load(path, lazy_keypoints=False)
+    with open(path) as f:
+        assert data == json.load(f)
+    assert spans == {}
+
+
+def test_lazy_load_matches_json_load(tmp_path, small_chunks):
+    path = write(tmp_path, make_dataset(), indent=2)
+    data, spans, _ = stream_load(path)
+    with open(path) as f:
+        expected = json.load(f)
+    assert all("keypoints" not in annotation for annotation in data["annotations"])
+    assert set(spans) == {image["id"] for image in expected["images"]}
+    for annotation in expected["annotations"]:
+        assert load_annotation(path, spans[annotation["image_id"]]) == annotation
+    stripped = [{k: v for k, v in annotation.items() if k != "keypoints"}
+                for annotation in expected["annotations"]]
+    assert data == dict(expected, annotations=stripped)
+
+
+def test_only_first_annotation_of_an_image_is_lazy(tmp_path):
+    dataset = make_dataset(count=2)
+    dataset["annotations"].append(dict(dataset["annotations"][0], id=999))
+    path = write(tmp_path, dataset)
+    data, spans, _ = stream_load(path)
+    assert set(spans) == {1, 2}
+    assert data["annotations"][-1]["keypoints"] == dataset["annotations"][0]["keypoints"]
+
+
+def test_non_ascii_file_loads_eagerly(tmp_path):
+    dataset = make_dataset(count=3)
+    dataset["info"]["description"] = "Tänzer"
+    path = write(tmp_path, dataset, ensure_ascii=False)
+    data, spans, _ = stream_load(path)
+    # Offsets are only byte offsets while the text is ASCII
+    assert spans == {}
+    assert data == dataset
+
+
+def test_progress_ends_at_one(tmp_path):
+    path = write(tmp_path, make_dataset(count=3))
+    reported = []
+    stream_load(path, reported.append)
+    assert reported[-1] == 1.0
+
+
+def test_signature_changes_when_file_is_rewritten(tmp_path):
+    path = write(tmp_path, make_dataset(count=3))
+    _, _, signature = stream_load(path)
+    write(tmp_path, make_dataset(count=4))
+    _, _, rewritten = stream_load(path)
+    assert rewritten != signature
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "annotations.json"
+    path.write_text(json.dumps(make_dataset(count=3))[:-20])
+    with pytest.raises(ValueError):
+        stream_load(str(path))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from frame_cache import FrameCache
+
+
+def frame(value, nbytes=100):
+    return np.full(nbytes, value, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = FrameCache(max_bytes=300)
+    for n in range(3):
+        cache.put("a.mp4", n, frame(n))
+    assert cache.get("a.mp4", 0) is not None  # 0 is now the most recent
+    cache.put("a.mp4", 3, frame(3))
+    assert ("a.mp4", 1) not in cache
+    assert [n for n in range(4) if ("a.mp4", n) in cache] == [0, 2, 3]
+    assert cache.current_bytes == 300
+
+
+def test_eviction_is_by_bytes_not_count():
+    cache = FrameCache(max_bytes=300)
+    cache.put("a.mp4", 0, frame(0, 100))
+    cache.put("a.mp4", 1, frame(1, 100))
+    cache.put("a.mp4", 2, frame(2, 250))
+    assert len(cache) == 1
+    assert cache.current_bytes == 250
+
+
+def test_frame_over_budget_is_not_cached():
+    cache = FrameCache(max_bytes=100)
+    cache.put("a.mp4", 0, frame(0, 50))
+    cache.put("a.mp4", 1, frame(1, 101))
+    assert ("a.mp4", 1) not in cache
+    assert ("a.mp4", 0) in cache
+
+
+def test_replacing_a_frame_keeps_byte_count():
+    cache = FrameCache(max_bytes=1000)
+    cache.put("a.mp4", 0, frame(0, 100))
+    cache.put("a.mp4", 0, frame(1, 200))
+    assert len(cache) == 1
+    assert cache.current_bytes == 200
+    assert cache.get("a.mp4", 0)[0] == 1
+
+
+def test_cached_frames_are_read_only():
+    cache = FrameCache()
+    cache.put("a.mp4", 0, frame(0))
+    with pytest.raises(ValueError):
+        cache.get("a.mp4", 0)[0] = 1
+
+
+def test_clear_one_video():
+    cache = FrameCache(max_bytes=1000)
+    cache.put("a.mp4", 0, frame(0))
+    cache.put("b.mp4", 0, frame(0))
+    cache.clear("a.mp4")
+    assert ("a.mp4", 0) not in cache and ("b.mp4", 0) in cache
+    assert cache.current_bytes == 100
+    cache.clear()
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = FrameCache(max_bytes=1000)
+    cache.put("a.mp4", 0, frame(0))
+    cache.get("a.mp4", 0)
+    cache.get("a.mp4", 1)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert (stats["frames"], stats["bytes"], stats["max_bytes"]) == (1, 100, 1000)
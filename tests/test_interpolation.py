@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from interpolation import interpolate_poses
+
+
+def poses(*keyframes):
+    """(M, K, 3) array from per-keyframe lists of (x, y, v)"""
+    return np.array(keyframes, dtype=np.float32)
+
+
+@pytest.mark.parametrize("method", ["linear", "spline"])
+def test_keyframes_are_reproduced(method):
+    keyframes = poses([(0, 0, 2)], [(10, 20, 1)], [(30, 10, 2)])
+    result = interpolate_poses([0, 10, 20], keyframes, [0, 10, 20], method)
+    np.testing.assert_allclose(result, keyframes, atol=1e-4)
+
+
+@pytest.mark.parametrize("method", ["linear", "spline"])
+def test_linear_motion_stays_linear(method):
+    keyframes = poses([(0, 0, 2)], [(10, 5, 2)], [(20, 10, 2)], [(30, 15, 2)])
+    result = interpolate_poses([0, 10, 20, 30], keyframes, [5, 15, 27], method)
+    np.testing.assert_allclose(result[:, 0, :2], [(5, 2.5), (15, 7.5), (27, 13.5)],
+                               atol=1e-4)
+
+
+def test_linear_midpoint():
+    keyframes = poses([(0, 0, 2)], [(10, 20, 2)])
+    result = interpolate_poses([0, 4], keyframes, [1, 2])
+    np.testing.assert_allclose(result[:, 0], [(2.5, 5, 2), (5, 10, 2)])
+
+
+def test_spline_uses_central_difference_tangents():
+    keyframes = poses([(0, 0, 2)], [(10, 10, 2)], [(20, 0, 2)], [(30, 30, 2)])
+    result = interpolate_poses([0, 10, 20, 30], keyframes, [15], "spline")
+    # y tangents are 0 at frame 10 and 1 at frame 20, so the midpoint is
+    # (10 + 0) / 2 + 10 * (0 - 1) / 8
+    np.testing.assert_allclose(result[0, 0], (15, 3.75, 2), atol=1e-4)
+
+
+@pytest.mark.parametrize("method", ["linear", "spline"])
+def test_unlabelled_keyframe_joint_is_skipped(method):
+    # Joint 1 is unlabelled at frame 10; it must not be pulled towards (0, 0)
+    keyframes = poses([(0, 0, 2), (100, 100, 2)],
+                      [(10, 0, 2), (0, 0, 0)],
+                      [(20, 0, 2), (120, 100, 2)])
+    result = interpolate_poses([0, 10, 20], keyframes, [10], method)
+    np.testing.assert_allclose(result[0, 1], (110, 100, 2), atol=1e-4)
+
+
+def test_estimate_takes_lower_visibility_of_neighbours():
+    keyframes = poses([(0, 0, 2)], [(10, 0, 1)], [(20, 0, 2)])
+    result = interpolate_poses([0, 10, 20], keyframes, [5, 10, 15])
+    assert result[:, 0, 2].tolist() == [1, 1, 1]
+
+
+@pytest.mark.parametrize("method", ["linear", "spline"])
+def test_outside_labelled_range_is_unlabelled(method):
+    keyframes = poses([(0, 0, 0), (0, 0, 2)], [(10, 0, 2), (10, 0, 2)],
+                      [(20, 0, 2), (20, 0, 2)])
+    result = interpolate_poses([0, 10, 20], keyframes, [-1, 5, 21], method)
+    assert result[:, 0, 2].tolist() == [0, 0, 0]
+    assert result[:, 1, 2].tolist() == [0, 2, 0]
+    assert not result[[0, 2]].any()
+
+
+def test_joint_with_one_keyframe_is_unlabelled():
+    keyframes = poses([(5, 5, 2), (0, 0, 0)], [(6, 6, 2), (7, 7, 2)])
+    result = interpolate_poses([0, 10], keyframes, [5])
+    assert result[0, 1].tolist() == [0, 0, 0]
+
+
+def test_max_gap():
+    keyframes = poses([(0, 0, 2)], [(10, 0, 2)], [(40, 0, 2)])
+    result = interpolate_poses([0, 10, 40], keyframes, [5, 25], max_gap=20)
+    assert result[:, 0, 2].tolist() == [2, 0]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        interpolate_poses([0, 1], poses([(0, 0, 2)], [(1, 1, 2)]), [0], "cubic")
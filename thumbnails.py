@@ -0,0 +1,202 @@
+import math
+import os
+import tempfile
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import pyqtSignal
+
+from latest_worker import LatestRequestWorker
+from mapped_file import (matches_source, place_sections, read_header, source_signature,
+                         write_header)
+
+ATLAS_VERSION = 1
+MAGIC = b"POSETHMB"
+
+
+def atlas_path(output_dir, video_file):
+    """Where the thumbnail atlas of video_file lives in an output directory"""
+    return os.path.join(output_dir, "thumbnails", video_file + ".thumbs")
+
+
+class ThumbnailAtlas:
+    """Memory-mapped file holding small BGR thumbnails of every stride-th frame
+
+    The file is a header followed by a ``built`` flag per thumbnail and one
+    (count, height, width, 3) uint8 array of pixels, so a thumbnail is a
+    slice of the mapping and reading it never involves the decoder. The
+    builder fills the file in place and sets a thumbnail's flag after its
+    pixels; readers map the same file and see thumbnails as they appear.
+    An interrupted build resumes where it stopped.
+    """
+
+    def __init__(self, path, header, mode='r'):
+        self.path = path
+        self.video_file = header["video_file"]
+        self.frame_count = header["frame_count"]
+        self.stride = header["stride"]
+        self.width = header["width"]
+        self.height = header["height"]
+        self.count = header["count"]
+        self.built = np.memmap(path, dtype=np.uint8, mode=mode,
+                               offset=header["offsets"]["built"], shape=(self.count,))
+        self.pixels = np.memmap(path, dtype=np.uint8, mode=mode,
+                                offset=header["offsets"]["pixels"],
+                                shape=(self.count, self.height, self.width, 3))
+
+    @staticmethod
+    def layout(frame_count, frame_size, width=96, max_count=3000):
+        """Return (stride, count, thumbnail width, thumbnail height) for a video"""
+        frame_width, frame_height = frame_size
+        stride = max(1, math.ceil(frame_count / max_count))
+        count = max(1, math.ceil(frame_count / stride))
+        height = max(2, round(width * frame_height / max(1, frame_width)))
+        return stride, count, width, height
+
+    @classmethod
+    def create(cls, path, video_path, frame_count, frame_size, width=96, max_count=3000):
+        """Write an empty atlas for video_path and open it for building"""
+        stride, count, width, height = cls.layout(frame_count, frame_size, width, max_count)
+        header = {
+            "version": ATLAS_VERSION,
+            "video_file": os.path.basename(video_path),
+            **source_signature(video_path),
+            "frame_count": frame_count,
+            "stride": stride,
+            "width": width,
+            "height": height,
+            "count": count,
+        }
+        size = place_sections(MAGIC, header, [("built", count),
+                                              ("pixels", count * height * width * 3)])
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # The GUI may still have the old atlas mapped; truncating it in place
+        # would fault its reads, so the new file replaces it instead
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                        prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_header(f, MAGIC, header)
+                f.truncate(size)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return cls(path, header, mode='r+')
+
+    @classmethod
+    def open(cls, path, video_path=None, mode='r'):
+        """Open an atlas, or return None if it is missing or video_path has changed"""
+        header = read_header(path, MAGIC, ATLAS_VERSION)
+        if header is None:
+            return None
+        try:
+            if video_path is not None and not matches_source(header, video_path):
+                return None
+            return cls(path, header, mode)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def index_of(self, frame_number):
+        """Thumbnail covering frame_number (the last one at or before it)"""
+        return min(max(int(frame_number) // self.stride, 0), self.count - 1)
+
+    def frame_of(self, index):
+        return index * self.stride
+
+    def thumbnail(self, frame_number):
+        """(height, width, 3) BGR view of frame_number's thumbnail, or None if not built yet"""
+        index = self.index_of(frame_number)
+        if not self.built[index]:
+            return None
+        return self.pixels[index]
+
+    def built_count(self):
+        return int(np.count_nonzero(self.built))
+
+    def is_complete(self):
+        return bool(self.built.all())
+
+    def flush(self):
+        self.built.flush()
+        self.pixels.flush()
+
+
+def build_thumbnails(video_path, atlas, should_stop=None, progress=None, progress_every=50):
+    """Decode video_path in one forward pass and fill the unbuilt thumbnails of atlas
+
+    Frames between thumbnails are only grabbed, not decoded to pixels.
+    Returns True when the atlas is complete.
+    """
+    missing = np.flatnonzero(atlas.built == 0)
+    if not len(missing):
+        return True
+    cap = cv2.VideoCapture(video_path)
+    try:
+        start = atlas.frame_of(int(missing[0]))
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        built_since_report = 0
+        for frame_number in range(start, atlas.frame_count):
+            if should_stop is not None and should_stop():
+                break
+            index, remainder = divmod(frame_number, atlas.stride)
+            if remainder or atlas.built[index]:
+                if not cap.grab():
+                    break
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            atlas.pixels[index] = cv2.resize(frame, (atlas.width, atlas.height),
+                                             interpolation=cv2.INTER_AREA)
+            atlas.built[index] = 1
+            built_since_report += 1
+            if built_since_report >= progress_every:
+                built_since_report = 0
+                atlas.flush()
+                if progress is not None:
+                    progress()
+    finally:
+        cap.release()
+        atlas.flush()
+    if progress is not None:
+        progress()
+    return atlas.is_complete()
+
+
+class ThumbnailBuilder(LatestRequestWorker):
+    """Build thumbnail atlases on a worker thread, one video at a time
+
+    request() creates or resumes the atlas of a video; a newer request stops
+    the current build, which picks up where it left off when that video is
+    requested again. atlasReady is emitted once the file exists, so the GUI
+    can map it while the thumbnails are still being filled in.
+    """
+    atlasReady = pyqtSignal(str, str)  # video_path, atlas path
+    progress = pyqtSignal(str, int, int)  # video_path, built, count
+
+    def __init__(self, width=96, max_count=3000, parent=None):
+        super().__init__(parent)
+        self.width = width
+        self.max_count = max_count
+
+    def request(self, video_path, path, frame_count, frame_size):
+        self._submit((video_path, path, frame_count, frame_size))
+
+    def _handle(self, request, generation):
+        video_path, path, frame_count, frame_size = request
+        try:
+            atlas = ThumbnailAtlas.open(path, video_path, mode='r+')
+            if (atlas is None or atlas.frame_count != frame_count or
+                atlas.width != self.width):
+                atlas = ThumbnailAtlas.create(path, video_path, frame_count, frame_size,
+                                              self.width, self.max_count)
+        except OSError:
+            return
+        self.atlasReady.emit(video_path, path)
+        build_thumbnails(video_path, atlas, lambda: self._is_stale(generation),
+                         lambda: self.progress.emit(video_path, atlas.built_count(),
+                                                    atlas.count))
@@ -0,0 +1,131 @@
+import math
+import threading
+from collections import OrderedDict
+
+import cv2
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsObject, QStyleOptionGraphicsItem
+from PyQt5.QtGui import QImage, QPixmap, QPainter
+from PyQt5.QtCore import QRectF, pyqtSignal
+
+
+def frame_to_qimage(frame):
+    """Wrap a decoded BGR frame in a QImage without copying or converting it"""
+    if not frame.flags['C_CONTIGUOUS']:
+        frame = frame.copy()
+    height, width = frame.shape[:2]
+    if hasattr(QImage, 'Format_BGR888'):
+        q_image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+    else:
+        # Qt < 5.14 has no BGR format; fall back to one conversion
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        q_image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_RGB888)
+    # QImage does not own the buffer, so keep the array alive alongside it
+    q_image.ndarray = frame
+    return q_image
+
+
+class TiledImageItem(QGraphicsObject):
+    """Paint a very large frame from a tiled image pyramid
+
+    Level 0 is the full resolution frame; each further level is half the size
+    of the one before and is built with cv2.pyrDown on a background thread.
+    paint() picks the level closest to the view's zoom and uploads only the
+    tiles that intersect the exposed area, so the cost of a repaint depends on
+    the viewport size rather than the frame size. Tiles are kept in a small
+    LRU cache of QPixmaps.
+    """
+    levelReady = pyqtSignal()
+
+    def __init__(self, tile_size=512, max_cached_tiles=128, parent=None):
+        super().__init__(parent)
+        self.tile_size = tile_size
+        self.max_cached_tiles = max_cached_tiles
+        self.levels = []
+        self._tiles = OrderedDict()  # (level, tile x, tile y) -> QPixmap
+        self._rect = QRectF()
+        self._generation = 0
+        # exposedRect is only filled in with the extended style option
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self.levelReady.connect(self.update)
+
+    def set_image(self, frame):
+        """Show a new BGR frame and start building its pyramid"""
+        self.prepareGeometryChange()
+        self._generation += 1
+        self._tiles.clear()
+        height, width = frame.shape[:2]
+        self._rect = QRectF(0, 0, width, height)
+        # The worker appends to this list; a newer frame gets a new one
+        self.levels = [frame]
+        threading.Thread(target=self._build_pyramid,
+                         args=(self.levels, self._generation), daemon=True).start()
+        self.update()
+
+    def clear(self):
+        self.prepareGeometryChange()
+        self._generation += 1
+        self._tiles.clear()
+        self._rect = QRectF()
+        self.levels = []
+
+    def _build_pyramid(self, levels, generation):
+        level = levels[0]
+        while max(level.shape[:2]) > self.tile_size:
+            if generation != self._generation:
+                return
+            level = cv2.pyrDown(level)
+            levels.append(level)
+            self.levelReady.emit()
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        levels = self.levels
+        if not levels:
+            return
+        # Screen pixels per frame pixel at the current zoom
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        wanted = int(math.log2(1 / lod)) if 0 < lod < 1 else 0
+        level_index = min(wanted, len(levels) - 1)
+        if wanted - level_index > 1:
+            # Zoomed far out before the pyramid is built: drawing level 0 here
+            # would upload the whole frame, so wait for levelReady instead
+            return
+        level = levels[level_index]
+        level_height, level_width = level.shape[:2]
+        # pyrDown rounds sizes up, so scale per axis instead of by 2 ** level
+        scale_x = self._rect.width() / level_width
+        scale_y = self._rect.height() / level_height
+
+        exposed = option.exposedRect.intersected(self._rect)
+        if exposed.isEmpty():
+            return
+        tile = self.tile_size
+        first_x = int(exposed.left() / scale_x) // tile
+        last_x = min(int(math.ceil(exposed.right() / scale_x)), level_width - 1) // tile
+        first_y = int(exposed.top() / scale_y) // tile
+        last_y = min(int(math.ceil(exposed.bottom() / scale_y)), level_height - 1) // tile
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, lod < 1)
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                pixmap = self._tile(level_index, level, tile_x, tile_y)
+                target = QRectF(tile_x * tile * scale_x, tile_y * tile * scale_y,
+                                pixmap.width() * scale_x, pixmap.height() * scale_y)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+    def _tile(self, level_index, level, tile_x, tile_y):
+        key = (level_index, tile_x, tile_y)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+        x0 = tile_x * self.tile_size
+        y0 = tile_y * self.tile_size
+        region = level[y0:y0 + self.tile_size, x0:x0 + self.tile_size]
+        pixmap = QPixmap.fromImage(frame_to_qimage(region))
+        self._tiles[key] = pixmap
+        while len(self._tiles) > self.max_cached_tiles:
+            self._tiles.popitem(last=False)
+        return pixmap
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+from bisect import bisect_left, bisect_right
+
+import cv2
+
+INDEX_VERSION = 2
+
+
+def sidecar_path(video_path):
+    """Return the path of the index file stored next to a video"""
+    return video_path + ".index.json"
+
+
+def _file_signature(video_path):
+    stat = os.stat(video_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class KeyframeIndex:
+    """Keyframe positions and per-frame timestamps of a video stream
+
+    Frames are numbered in presentation order. ``keyframes`` holds the frame
+    numbers that can be decoded without earlier frames, so any frame can be
+    reached by seeking to the preceding keyframe and decoding forward.
+    """
+
+    def __init__(self, timestamps_ms, keyframes):
+        self.timestamps_ms = timestamps_ms
+        self.keyframes = keyframes
+
+    @property
+    def frame_count(self):
+        return len(self.timestamps_ms)
+
+    def keyframe_before(self, frame_number):
+        """Return the last keyframe at or before frame_number"""
+        i = bisect_right(self.keyframes, frame_number) - 1
+        return self.keyframes[max(i, 0)]
+
+    def frame_at(self, timestamp_ms):
+        """Return the frame whose timestamp is nearest to timestamp_ms"""
+        i = bisect_left(self.timestamps_ms, timestamp_ms)
+        if i == len(self.timestamps_ms) or (
+                i > 0 and timestamp_ms - self.timestamps_ms[i - 1] < self.timestamps_ms[i] - timestamp_ms):
+            i -= 1
+        return max(i, 0)
+
+    @classmethod
+    def build(cls, video_path):
+        """Scan the container once without decoding and return the index
+
+        Returns None when the OpenCV backend cannot read raw packets.
+        """
+        cap = cv2.VideoCapture(video_path)
+        try:
+            # Raw packet mode demuxes the stream without decoding any frames
+            if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+                return None
+            packets = []
+            while cap.grab():
+                packets.append((cap.get(cv2.CAP_PROP_POS_MSEC),
+                                bool(cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME))))
+        finally:
+            cap.release()
+
+        if not packets or not any(is_key for _, is_key in packets):
+            return None
+
+        # Packets arrive in decode order; frames are numbered by timestamp
+        packets.sort(key=lambda packet: packet[0])
+        timestamps_ms = [t for t, _ in packets]
+        keyframes = [i for i, (_, is_key) in enumerate(packets) if is_key]
+        return cls(timestamps_ms, keyframes)
+
+    @classmethod
+    def load(cls, video_path):
+        """Read the sidecar index, or None if it is missing or out of date"""
+        path = sidecar_path(video_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        size, mtime_ns = _file_signature(video_path)
+        if (data.get("version") != INDEX_VERSION or
+            data.get("size") != size or data.get("mtime_ns") != mtime_ns):
+            return None
+        return cls(data["timestamps_ms"], data["keyframes"])
+
+    def save(self, video_path):
+        """Atomically write the sidecar index next to the video"""
+        size, mtime_ns = _file_signature(video_path)
+        data = {
+            "version": INDEX_VERSION,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "keyframes": self.keyframes,
+            "timestamps_ms": self.timestamps_ms
+        }
+        path = sidecar_path(video_path)
+        # The GUI and the prefetch thread may index the same video at once,
+        # so each writer gets its own temporary file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                        prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load_or_build(cls, video_path):
+        """Return the sidecar index, building and saving it on first use"""
+        index = cls.load(video_path)
+        if index is None:
+            index = cls.build(video_path)
+            if index is not None:
+                try:
+                    index.save(video_path)
+                except OSError:
+                    # Read-only media: keep the index for this session only
+                    pass
+        return index
@@ -0,0 +1,161 @@
+import os
+import cv2
+
+from frame_cache import FrameCache
+from video_index import KeyframeIndex
+from perf import timed
+
+
+def write_frame(frame, output_path):
+    """Encode a BGR frame into output_path and fsync it; False if it cannot be encoded"""
+    # The frame is already BGR, which is what imencode expects. Encoding
+    # in memory lets the file be fsynced, so a reported save is durable
+    ok, encoded = cv2.imencode(os.path.splitext(output_path)[1], frame)
+    if not ok:
+        return False
+    with open(output_path, 'wb') as f:
+        f.write(encoded.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+class VideoProcessor:
+    def __init__(self, frame_cache=None, seek_threshold=30):
+        self.video_path = None
+        self.cap = None
+        self.total_frames = 0
+        self.fps = 0
+        self.frame_width = 0
+        self.frame_height = 0
+        # Decoded frames shared across get_frame/save_frame calls
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        # Index of the frame the decoder will return next (None if unknown)
+        self.position = None
+        # Forward jumps up to this many frames are decoded instead of seeking
+        self.seek_threshold = seek_threshold
+        # Optional keyframe index for accurate seeking (see video_index.py)
+        self.index = None
+        
+    def load_video(self, video_path, use_index=False):
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.position = 0
+        
+        # The index counts frames in the container, which is exact even for
+        # variable frame rate files where CAP_PROP_FRAME_COUNT is an estimate,
+        # and maps decoder timestamps back to frame numbers after each seek
+        self.index = KeyframeIndex.load_or_build(video_path) if use_index else None
+        if self.index is not None:
+            self.total_frames = self.index.frame_count
+        
+    @timed()
+    def get_frame(self, frame_number):
+        if self.cap is None:
+            return None
+        
+        # Revisited frames come straight from the cache
+        frame = self.frame_cache.get(self.video_path, frame_number)
+        if frame is not None:
+            return frame
+        
+        if self._move_to(frame_number):
+            ret, frame = self.cap.retrieve()
+        else:
+            ret, frame = self.cap.read()
+        if ret:
+            # Frames stay BGR end to end; the GUI displays BGR directly
+            self.position = frame_number + 1
+            self.frame_cache.put(self.video_path, frame_number, frame)
+            return frame
+        self.position = None
+        return None
+    
+    def _move_to(self, frame_number):
+        """Position the decoder on frame_number
+
+        Returns True when frame_number has already been grabbed and only
+        needs retrieve(), otherwise the next read returns it.
+        """
+        if self.index is not None:
+            return self._move_to_indexed(frame_number)
+        
+        skip = None if self.position is None else frame_number - self.position
+        if skip is None or skip < 0 or skip > self.seek_threshold:
+            # Backward or long jumps: seeking restarts decoding at a keyframe
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            self.position = frame_number
+            return False
+        
+        # Short forward jumps: decoding the frames in between is cheaper than a seek
+        for _ in range(skip):
+            if not self.cap.grab():
+                self.position = None
+                return False
+            self.position += 1
+        return False
+    
+    def _move_to_indexed(self, frame_number):
+        """Grab frame_number, seeking to the preceding keyframe unless decoding on is cheaper"""
+        keyframe = self.index.keyframe_before(frame_number)
+        # Keep decoding when the decoder is already in the target's GOP or
+        # only a few frames behind it; otherwise jump to the keyframe
+        behind = self.position is not None and self.position <= frame_number
+        if behind and (self.position >= keyframe or
+                       frame_number - self.position <= self.seek_threshold):
+            grabbed = self.position - 1
+        else:
+            grabbed = self._seek_indexed(keyframe, frame_number)
+        
+        while grabbed is not None and grabbed < frame_number:
+            grabbed = grabbed + 1 if self.cap.grab() else None
+        if grabbed is None:
+            self.position = None
+            return False
+        return True
+    
+    def _seek_indexed(self, keyframe, frame_number):
+        """Seek to keyframe, grab the frame the decoder lands on and return its number
+
+        OpenCV converts the requested position to a time at the average frame
+        rate, so on variable frame rate video it lands on some other
+        keyframe. The landing frame is identified by its timestamp; when it
+        is past frame_number, or past the end, an earlier keyframe is
+        requested instead.
+        """
+        while True:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            if self.cap.grab():
+                landed = self.index.frame_at(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+                if landed <= frame_number:
+                    return landed
+                overshoot = landed - frame_number
+            else:
+                overshoot = 0
+            if keyframe == 0:
+                return None
+            keyframe = self.index.keyframe_before(max(0, keyframe - 1 - overshoot))
+    
+    @staticmethod
+    def frame_filename(image_id):
+        # Format filename with 12 digits using image_id (COCO format)
+        return f"{image_id:012d}.jpg"
+    
+    def save_frame(self, frame_number, output_dir, image_id, frame=None):
+        # Callers that already hold the decoded frame pass it in, which
+        # avoids touching the decoder and makes this safe off the GUI thread
+        if frame is None:
+            frame = self.get_frame(frame_number)
+        if frame is not None:
+            filename = self.frame_filename(image_id)
+            if write_frame(frame, os.path.join(output_dir, filename)):
+                return filename
+        return None
+    
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,20 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+
+def init_worker():
+    """Initializer of the worker processes that decode frames"""
+    # One decoder per process; OpenCV's own thread pool would oversubscribe
+    cv2.setNumThreads(1)
+
+
+def run_tasks(func, tasks, workers=1, chunksize=1):
+    """Map func over tasks, in worker processes when workers > 1 (None: one per CPU)"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                             initializer=init_worker) as executor:
+        return list(executor.map(func, tasks, chunksize=chunksize))
@@ -0,0 +1,120 @@
+import json
+import os
+from collections import OrderedDict
+
+from frame_cache import FrameCache
+from video_processor import VideoProcessor
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
+
+
+class DecoderPool:
+    """Bounded LRU pool of open VideoProcessors keyed by video path
+
+    Opening a video means a file open, a container probe and possibly a
+    keyframe index load; a pooled decoder keeps all of that, so returning to
+    a recently used video costs only a seek. All decoders share one
+    FrameCache. A pool must only be used from one thread, because
+    cv2.VideoCapture is not thread-safe.
+    """
+
+    def __init__(self, frame_cache=None, max_open=4, seek_threshold=30, use_index=False):
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        self.max_open = max_open
+        self.seek_threshold = seek_threshold
+        self.use_index = use_index
+        self._decoders = OrderedDict()  # video_path -> VideoProcessor
+
+    def get(self, video_path):
+        """Return an open decoder for video_path, opening it if needed"""
+        processor = self._decoders.get(video_path)
+        if processor is not None:
+            self._decoders.move_to_end(video_path)
+        else:
+            processor = VideoProcessor(self.frame_cache, self.seek_threshold)
+            processor.load_video(video_path, self.use_index)
+            if not processor.cap.isOpened():
+                processor.close()
+                raise OSError(f"Cannot open video {video_path}")
+            self._decoders[video_path] = processor
+        while len(self._decoders) > max(1, self.max_open):
+            _, evicted = self._decoders.popitem(last=False)
+            evicted.close()
+        return processor
+
+    def __contains__(self, video_path):
+        return video_path in self._decoders
+
+    def __len__(self):
+        return len(self._decoders)
+
+    def close(self):
+        for processor in self._decoders.values():
+            processor.close()
+        self._decoders.clear()
+
+
+class VideoWorkspace:
+    """The source videos of a project, looked up by the video_file name
+
+    Annotations refer to videos by file name only; the workspace maps those
+    names to paths on this machine and opens them through a DecoderPool.
+    The registry can be saved as workspace.json in the output directory so
+    a project reopens with its videos.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else DecoderPool()
+        self.videos = {}  # video_file -> path
+
+    def register(self, video_path):
+        """Add a video and return the name annotations use for it"""
+        video_file = os.path.basename(video_path)
+        self.videos[video_file] = os.path.abspath(video_path)
+        return video_file
+
+    def register_directory(self, directory):
+        """Register every video file directly inside directory"""
+        registered = []
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.lower().endswith(VIDEO_EXTENSIONS) and os.path.isfile(path):
+                registered.append(self.register(path))
+        return registered
+
+    def __contains__(self, video_file):
+        return video_file in self.videos
+
+    def __len__(self):
+        return len(self.videos)
+
+    def path_of(self, video_file):
+        return self.videos.get(video_file)
+
+    def processor(self, video_file):
+        """Open decoder for a registered video; raises KeyError if unknown"""
+        processor = self.pool.get(self.videos[video_file])
+        processor.video_file = video_file
+        return processor
+
+    def get_frame(self, video_file, frame_number):
+        return self.processor(video_file).get_frame(frame_number)
+
+    def load(self, path):
+        """Merge the registry saved at path, skipping videos that no longer exist"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            videos = json.load(f).get("videos", {})
+        for video_file, video_path in videos.items():
+            if os.path.exists(video_path):
+                self.videos[video_file] = video_path
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"videos": self.videos}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.pool.close()